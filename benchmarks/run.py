@@ -0,0 +1,279 @@
+"""
+Benchmarks for gith commands on synthetic repositories.
+
+Every run builds throwaway repositories with the requested number of branches and files,
+using a local bare repository as `origin`, so no network access is needed. Each scenario
+is executed through the Typer app in a fresh interpreter, like a real `gith` call, and reports:
+
+* wall time of the whole call, including interpreter start up (median of --repeat runs)
+* number of git subprocesses spawned by gith
+* peak RSS of the gith process
+
+Examples:
+
+    python benchmarks/run.py --branches 10,1000,10000
+    python benchmarks/run.py --branches 100000 --files 1000 --scenarios list,keep --save baseline.json
+    python benchmarks/run.py --compare baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> gith arguments. "{index}" is replaced by the index of the first synthetic branch
+# and "{delete}" by the indexes of the first DELETE_COUNT ones. "import" only imports gith.cli.
+SCENARIOS = {
+    "import": None,
+    "list": ["branch", "--list"],
+    "checkout": ["checkout", "{index}", "--no-pull"],
+    "delete": ["branch", "-d", "{delete}"],
+    "keep": ["branch", "-k", "1"],
+    "create": ["branch", "-c", "bench", "new", "--from", "{index}"],
+    "complete": ["checkout", ""],
+}
+MAIN_BRANCH = "main"
+BRANCH_PREFIX = "bench/"
+DELETE_COUNT = 10
+
+
+def git(*args: str, cwd: str, input: str = None) -> str:
+    """Run git for the benchmark set up, failing loudly."""
+    result = subprocess.run(
+        ["git", *args], cwd=cwd, input=input, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+def build_repo(root: str, branches: int, files: int) -> str:
+    """
+    Build a clone with `branches` local branches and `files` tracked files, and its bare origin.
+
+    Returns the path of the clone.
+    """
+    os.makedirs(root, exist_ok=True)
+    origin = os.path.join(root, "origin.git")
+    clone = os.path.join(root, "clone")
+    git("init", "-q", "--bare", "-b", MAIN_BRANCH, origin, cwd=root)
+    git("init", "-q", "-b", MAIN_BRANCH, clone, cwd=root)
+    git("config", "user.name", "gith bench", cwd=clone)
+    git("config", "user.email", "bench@gith.invalid", cwd=clone)
+    for i in range(files):
+        directory = os.path.join(clone, f"dir{i // 1000:04d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i:06d}.txt"), "w") as file:
+            file.write(f"{i}\n")
+    git("add", "-A", cwd=clone)
+    git("commit", "-q", "--allow-empty", "-m", "initial", cwd=clone)
+    git("remote", "add", "origin", origin, cwd=clone)
+    git("push", "-q", "origin", MAIN_BRANCH, cwd=clone)
+    oid = git("rev-parse", "HEAD", cwd=clone).strip()
+    names = [f"{BRANCH_PREFIX}{i:06d}" for i in range(branches - 1)]
+    git("update-ref", "--stdin", cwd=clone, input="".join(f"create refs/heads/{name} {oid}\n" for name in names))
+    if names:
+        git("push", "-q", "origin", names[0], cwd=clone)
+    git("pack-refs", "--all", cwd=clone)
+    return clone
+
+
+def reset_repo(clone: str) -> None:
+    """Go back to the state left by build_repo, after a scenario changed branches or HEAD."""
+    git("checkout", "-q", "-f", MAIN_BRANCH, cwd=clone)
+    git("reset", "-q", "--hard", cwd=clone)
+    refs = git("for-each-ref", "--format=%(refname)", "refs/heads", cwd=clone).split()
+    commands = "".join(f"delete {ref}\n" for ref in refs if ref != f"refs/heads/{MAIN_BRANCH}")
+    if commands:
+        git("update-ref", "--stdin", cwd=clone, input=commands)
+    with open(os.path.join(clone, ".git", "gith-bench-refs")) as file:
+        git("update-ref", "--stdin", cwd=clone, input=file.read())
+
+
+def save_refs(clone: str) -> None:
+    """Remember the branches created by build_repo, so reset_repo can restore them."""
+    refs = git("for-each-ref", "--format=create %(refname) %(objectname)", "refs/heads", cwd=clone)
+    lines = [line for line in refs.splitlines() if not line.startswith(f"create refs/heads/{MAIN_BRANCH} ")]
+    with open(os.path.join(clone, ".git", "gith-bench-refs"), "w") as file:
+        file.write("".join(f"{line}\n" for line in lines))
+
+
+def scenario_args(scenario: str, branches: int) -> list:
+    """Returns the gith arguments for the scenario, with the placeholders filled in."""
+    index = "2" if branches > 1 else "1"
+    delete = ",".join(str(i) for i in range(2, min(branches, DELETE_COUNT + 1) + 1)) or "2"
+    return [arg.format(index=index, delete=delete) for arg in SCENARIOS[scenario]]
+
+
+def worker(scenario: str, args: list) -> None:
+    """
+    Run one scenario in this interpreter and print its metrics as JSON on the last line.
+
+    Executed in a fresh interpreter by run_scenario, with the repository as working directory.
+    """
+    import resource
+
+    git_calls = 0
+    original_init = subprocess.Popen.__init__
+
+    def counting_init(self, cmd, *popen_args, **kwargs):
+        nonlocal git_calls
+        argv = [cmd] if isinstance(cmd, str) else list(cmd)
+        if argv and os.path.basename(str(argv[0])) == "git":
+            git_calls += 1
+        original_init(self, cmd, *popen_args, **kwargs)
+
+    subprocess.Popen.__init__ = counting_init
+    exit_code = 0
+    if scenario == "import":
+        import gith.cli  # noqa: F401
+    else:
+        from gith.cli import app
+
+        if scenario == "complete":
+            os.environ["_GITH_COMPLETE"] = "complete_bash"
+            os.environ["COMP_WORDS"] = " ".join(["gith", *args])
+            os.environ["COMP_CWORD"] = str(len(args))
+            args = []
+        try:
+            app(args, prog_name="gith")
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+        from gith.console import console
+
+        # buffered messages are otherwise written at exit, after the metrics
+        console.flush()
+    sys.stdout.flush()
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb //= 1024
+    print(json.dumps({"git_calls": git_calls, "peak_rss_kb": peak_rss_kb, "exit_code": exit_code}))
+
+
+def run_scenario(clone: str, scenario: str, branches: int, repeat: int) -> dict:
+    """
+    Run a scenario `repeat` times in fresh interpreters and return its metrics.
+
+    If gith or the interpreter exits with an error, the scenario is not timed and the result only has an "error".
+    """
+    args = scenario_args(scenario, branches) if SCENARIOS[scenario] else []
+    times = []
+    metrics = {}
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    for _ in range(repeat):
+        reset_repo(clone)
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", scenario, "--", *args],
+            cwd=clone,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        times.append(time.perf_counter() - start)
+        lines = result.stdout.strip().splitlines()
+        try:
+            metrics = json.loads(lines[-1])
+            lines = lines[:-1]
+        except (IndexError, ValueError):
+            metrics = {}
+        exit_code = metrics.get("exit_code") or result.returncode
+        if not metrics or exit_code:
+            # without the borders of the message panels
+            output = (line.strip("│╭╮╰╯─ ") for line in [*lines, *result.stderr.splitlines()])
+            return {"error": f"exit code {exit_code}: {' '.join(filter(None, output)) or 'no output'}"}
+    return {"wall_ms": round(statistics.median(times) * 1000, 2), **metrics}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print the differences with a baseline and return the regressions.
+
+    A regression is a wall time more than `threshold` (ratio) slower, or more git calls. A case that
+    failed in either run can not be compared, and is reported as a regression too.
+    """
+    regressions = []
+    print(f"\n{'case':<24}{'baseline ms':>14}{'current ms':>14}{'change':>10}{'git calls':>14}")
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        if "error" in previous or "error" in current:
+            failed = "baseline failed" if "error" in previous else "current failed"
+            print(f"{case:<24}{failed:>38}")
+            regressions.append(case)
+            continue
+        change = current["wall_ms"] / previous["wall_ms"] - 1 if previous["wall_ms"] else 0.0
+        calls = f"{previous['git_calls']} -> {current['git_calls']}"
+        print(f"{case:<24}{previous['wall_ms']:>14.1f}{current['wall_ms']:>14.1f}{change:>+10.0%}{calls:>14}")
+        if change > threshold or current["git_calls"] > previous["git_calls"]:
+            regressions.append(case)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark gith commands on synthetic repositories.")
+    parser.add_argument("--branches", default="10,1000,10000", help="Comma-separated branch counts.")
+    parser.add_argument("--files", type=int, default=100, help="Number of files in the working tree.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, the median is reported.")
+    parser.add_argument("--save", help="Save the results as a JSON baseline.")
+    parser.add_argument("--compare", help="Compare the results with a saved JSON baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio when comparing.")
+    parser.add_argument("--keep-repos", action="store_true", help="Do not remove the synthetic repositories.")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("args", nargs="*", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker:
+        worker(options.worker, options.args)
+        return 0
+
+    scenarios = options.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {}
+    root = tempfile.mkdtemp(prefix="gith-bench-")
+    print(f"{'case':<24}{'wall ms':>10}{'git calls':>11}{'peak RSS MB':>13}")
+    try:
+        for branches in (int(count) for count in options.branches.split(",")):
+            clone = build_repo(os.path.join(root, str(branches)), branches, options.files)
+            save_refs(clone)
+            for scenario in scenarios:
+                case = f"{scenario}@{branches}"
+                results[case] = run_scenario(clone, scenario, branches, options.repeat)
+                result = results[case]
+                if "error" in result:
+                    print(f"{case:<24}{'failed':>10}  {result['error']}")
+                    continue
+                print(f"{case:<24}{result['wall_ms']:>10.1f}{result['git_calls']:>11}{result['peak_rss_kb'] / 1024:>13.1f}")
+    finally:
+        if options.keep_repos:
+            print(f"\nRepositories kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if options.save:
+        with open(options.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if options.compare:
+        with open(options.compare) as file:
+            regressions = compare(results, json.load(file), options.threshold)
+        if regressions:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            return 1
+    failures = [case for case, result in results.items() if "error" in result]
+    if failures:
+        print(f"\nFailed: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
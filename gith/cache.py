@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from typing import Optional
+
+from .refs import GithRefs, atomic_write
+
+
+class GithBranchCache:
+    """Persistent snapshot of the numbered branch list of a repository.
+
+    The snapshot is stored inside the Git directory of the worktree and is valid while the
+    modification times of HEAD, packed-refs and every directory under refs/heads stay the same.
+    Creating, deleting or renaming a branch, or switching to another one, changes at least one of them.
+    Snapshots are also kept in memory, which is what makes long-lived processes like `gith daemon`
+    answer without reading any file but the stat of the refs.
+    """
+
+    FILE_NAME = "gith-branches.json"
+    # Changes done within this window after a snapshot was taken may not change the mtimes,
+    # so the snapshot is not saved (same idea as the "racy" entries of the git index).
+    RACY_WINDOW_NS = 2_000_000_000
+    # snapshot path -> (signature, branches), shared by all the instances of the process
+    _memory = {}
+
+    def __init__(self, refs: GithRefs):
+        """
+        Initialize the cache for the repository of the given refs reader.
+
+        Args:
+            refs (GithRefs): Reader of the repository refs.
+        """
+        self.refs = refs
+        self.path = os.path.join(refs.git_dir, self.FILE_NAME)
+
+    def signature(self) -> list:
+        """
+        Returns the modification times (in ns) the snapshot depends on.
+        """
+        paths = [
+            os.path.join(self.refs.git_dir, "HEAD"),
+            os.path.join(self.refs.common_dir, "packed-refs"),
+        ]
+        for root, _, _ in os.walk(os.path.join(self.refs.common_dir, "refs", "heads")):
+            paths.append(root)
+        signature = []
+        for path in paths:
+            try:
+                signature.append([path, os.stat(path).st_mtime_ns])
+            except FileNotFoundError:
+                signature.append([path, None])
+        return signature
+
+    def load(self, signature: list) -> Optional[list[str]]:
+        """
+        Returns the saved branches if the snapshot matches the signature, None otherwise.
+
+        Args:
+            signature (list): Current signature of the refs.
+        """
+        memory = self._memory.get(self.path)
+        if memory is not None and memory[0] == signature:
+            return list(memory[1])
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get("signature") != signature:
+            return None
+        self._memory[self.path] = (signature, snapshot.get("branches"))
+        return snapshot.get("branches")
+
+    def save(self, signature: list, branches: list[str], taken_at: int) -> None:
+        """
+        Save the branches, unless the refs changed too recently to trust their mtimes.
+
+        Args:
+            signature (list): Signature of the refs the branches were read from.
+            branches (list[str]): Branches to save.
+            taken_at (int): Time (in ns) when the signature was computed.
+        """
+        if any(mtime is not None and taken_at - mtime < self.RACY_WINDOW_NS for _, mtime in signature):
+            return
+        self._memory[self.path] = (signature, branches)
+        try:
+            atomic_write(self.path, json.dumps({"signature": signature, "branches": branches}))
+        except OSError:
+            # the cache is an optimization, never fail because of it
+            pass
+
+    def branches(self) -> list[str]:
+        """
+        Returns the local branches, current branch first, from the snapshot when it is still valid.
+        """
+        taken_at = time.time_ns()
+        signature = self.signature()
+        branches = self.load(signature)
+        if branches is None:
+            branches = self.refs.branches()
+            self.save(signature, branches, taken_at)
+        return branches
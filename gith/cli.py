@@ -1,32 +1,79 @@
-import configparser
 import os
+import sys
 import typer
-from rich.console import Console
 from typing import List
 
+from .config import read_config
+from .console import console
 from .helpers import gith
 from .messages import GithMessage, GithMessageLevel
-from pathlib import Path
+from .profile import profiler
 
 app = typer.Typer()
-console = Console()
+daemon_app = typer.Typer(help="Keep gith warm in the background to answer branch, checkout and completion faster.")
+app.add_typer(daemon_app, name="daemon")
+multi_app = typer.Typer(help="Run branch, checkout and pull operations on many repositories in parallel.")
+app.add_typer(multi_app, name="multi")
+completion_app = typer.Typer(help="Complete branch indexes from a file kept up to date by git hooks, without running gith.")
+app.add_typer(completion_app, name="completion")
+worktree_app = typer.Typer(help="Manage the pool of worktrees used by gith checkout --worktree.")
+app.add_typer(worktree_app, name="worktree")
+sparse_app = typer.Typer(help="Check more directories out in a sparse clone, see gith repo --clone --sparse.")
+app.add_typer(sparse_app, name="sparse")
 
 
-def read_config():
-    config = configparser.ConfigParser()
-    config_path = os.path.join(Path.home() / "gith.conf")
-    if os.path.exists(config_path):
-        config.read(config_path)
-        return {section: dict(config.items(section)) for section in config.sections()}
-    return {}
+def __getattr__(name: str):
+    # keep `gith.cli.config` available without reading the file at import time
+    if name == "config":
+        return read_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@app.callback()
+def main(
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        envvar="GITH_PROFILE",
+        help="Trace every git call and print a timing report. Also enabled with GITH_PROFILE=1.",
+    ),
+    profile_output: str = typer.Option(
+        "gith-profile.json",
+        "--profile-output",
+        envvar="GITH_PROFILE_OUTPUT",
+        help="Path of the Chrome trace file written by --profile.",
+    ),
+    json: bool = typer.Option(
+        False,
+        "--json", "--porcelain",
+        envvar="GITH_JSON",
+        help="Write newline-delimited JSON records instead of tables and panels. Also enabled with GITH_JSON=1.",
+    ),
+):
+    """
+    Gith: A Typer-based CLI helper for Git operations.
+    """
+    console.json = json
+    set_branch_order()
+    if profile:
+        profiler.start(profile_output)
+
+
+def set_branch_order(recent: bool = False) -> None:
+    """
+    Order branches by their last checkout if recent is True or `order = recent` is set in
+    the [branch] section of gith.conf, alphabetically otherwise.
+    """
+    recent = recent or read_config().get("branch", {}).get("order") == "recent"
+    gith.order = "recent" if recent else "name"
 
-config = read_config()
 
 def branch_name_autocomplete(ctx: typer.Context, incomplete: str) -> List[str]:
     """
     Autocomplete function for branch names.
     """
-    branches = gith.git_branch(verbose=False)
+    set_branch_order(bool(ctx.params.get("recent")))
+    branches = gith.git_remote_branch() if ctx.params.get("remote") else gith.git_branch(verbose=False)
     return [
         f"{i} -> {name}"
         for i, name in enumerate(branches, start=1)
@@ -60,6 +107,53 @@ def branch(
         "--list", "-l",
         help="List local branches. Default behaviour if you call 'gith branch' without any option.",
     ),
+    limit: int = typer.Option(None, "--limit", "-n", help="Used with --list. Show at most this number of branches."),
+    filter: str = typer.Option(
+        None, "--filter", help="Used with --list. Only show branches matching a glob, e.g: 'feature/*'."
+    ),
+    sort: str = typer.Option(
+        None,
+        "--sort",
+        help="Used with --list. Sort by a git for-each-ref key, e.g: -committerdate. Indexes do not change.",
+    ),
+    recent: bool = typer.Option(
+        False,
+        "--recent",
+        help="Order branches by their last checkout. Indexes follow this order. Use it with checkout too.",
+    ),
+    details: bool = typer.Option(
+        False,
+        "--details",
+        help="Used with --list. Show last commit date, upstream, ahead/behind and merged status of every branch.",
+    ),
+    merged: bool = typer.Option(
+        False, "--merged", help="Only list, or delete with --delete and --keep, branches merged into --base."
+    ),
+    gone: bool = typer.Option(
+        False, "--gone", help="Only list, or delete with --delete and --keep, branches whose upstream is gone."
+    ),
+    base: str = typer.Option(
+        None, "--base", help="Branch used by --merged and --details. Defaults to the current branch."
+    ),
+    remote: bool = typer.Option(
+        False,
+        "--remote", "-r",
+        help=(
+            "List remote-tracking branches, as of the last fetch. Their indexes are used by checkout --remote, "
+            "and with --delete or --keep, to delete branches on their remote."
+        ),
+    ),
+    refresh: bool = typer.Option(
+        False, "--refresh", help="Fetch every remote, in a single git fetch, before anything else."
+    ),
+    local: bool = typer.Option(
+        False,
+        "--local",
+        help="Used with --remote and --delete or --keep. Delete the local branches of the same name too.",
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Used with --delete or --keep. Only show the branches that would be deleted."
+    ),
     create: bool = typer.Option(False, "--create", "-c", help="Create a new branch."),
     branch_name: List[str] = typer.Argument(None, help="Name for the new branch. You can use spaces in the name."),
     name_separator: str = typer.Option("_", help="Separator to use when creating a branch name with spaces."),
@@ -67,15 +161,26 @@ def branch(
     delete: str = typer.Option(
         False,
         "--delete", "-d",
-        help="Delete branches by their indexes. Autocompletion available.",
+        help=(
+            "Delete branches by their indexes, ranges (3-10), globs (feature/*), /regexes/ or (parts of) names. "
+            "Use !1 to exclude. Autocompletion available."
+        ),
         autocompletion=branch_name_autocomplete,
     ),
     keep: str = typer.Option(
         False,
         "--keep", "-k",
-        help="Keep the branches specified by indexes and delete the other branches. Autocompletion available.",
+        help=(
+            "Keep the branches specified by indexes, ranges, globs or /regexes/ and delete the other branches. "
+            "Autocompletion available."
+        ),
         autocompletion=branch_name_autocomplete,
     ),
+    atomic: bool = typer.Option(
+        False,
+        "--atomic",
+        help="Used with --delete or --keep. Delete nothing if any of the branches can not be deleted.",
+    ),
     from_branch: int = typer.Option(
         1,
         "--from", "-f",
@@ -88,55 +193,501 @@ def branch(
     """
     gith.validate_git_repo()
     validate_commands(delete, keep)
+    set_branch_order(recent)
+    if remote and (details or gone or merged and delete == "False" and keep == "False"):
+        GithMessage(
+            "--details and --gone only work with local branches, and --merged with --remote needs --delete or --keep.",
+            GithMessageLevel.ERROR,
+        )
+    if refresh:
+        gith.fetch_remotes()
     # TODO: find the best way to detect the action
     if delete != "False":
-        gith.delete_branches(delete)
+        gith.delete_branches(delete, atomic, merged, gone, base, remote, local, dry_run)
     elif keep != "False":
-        gith.keep_branches(keep)
+        gith.keep_branches(keep, atomic, merged, gone, base, remote, local, dry_run)
     elif list or not list and not create and not branch_name:
-        gith.git_branch()
+        gith.list_branches(filter, limit, sort, details, merged, gone, base, remote)
     elif create:
         # get name_separator from config file
-        name_separator = config.get("branch", {}).get("name_separator", False) or name_separator
+        name_separator = read_config().get("branch", {}).get("name_separator", False) or name_separator
         name = f"{name_separator}".join(branch_name)
         gith.create_branch(name, from_branch, checkout, name_separator)
-        if checkout:
-            gith.checkout_to_branch(name)
 
 
 @app.command()
 def checkout(
-    index: int = typer.Argument(
+    index: str = typer.Argument(
         ...,
-        help="Index of the branch to checkout to. Autocompletion available.",
+        help="Index of the branch to checkout to, or part of its name. Autocompletion available.",
         autocompletion=branch_name_autocomplete,
     ),
     pull: bool = typer.Option(
         True,
         help="Pull the latest changes from the remote repository after switching branches.",
     ),
+    recent: bool = typer.Option(
+        False, "--recent", help="Use the indexes of gith branch --recent, ordered by last checkout."
+    ),
+    worktree: bool = typer.Option(
+        None,
+        "--worktree/--no-worktree",
+        help="Check the branch out in a worktree of the pool instead of the current one. "
+        "Defaults to \\[worktree] pool in gith.conf.",
+    ),
+    path_only: bool = typer.Option(
+        False,
+        "--path-only",
+        help="Implies --worktree. Only print the worktree path, e.g: cd \"$(gith checkout --path-only 3)\".",
+    ),
+    remote: bool = typer.Option(
+        False,
+        "--remote", "-r",
+        help="Use the indexes of gith branch --remote, and create a local branch tracking the remote one.",
+    ),
+    refresh: bool = typer.Option(
+        False, "--refresh", help="Fetch every remote, in a single git fetch, before looking for the branch."
+    ),
+):
+    """
+    A helper command to checkout to a branch by its index, or by its name with fuzzy matching.
+    """
+    set_branch_order(recent)
+    if refresh:
+        gith.fetch_remotes(verbose=not path_only)
+    if remote:
+        branches = gith.git_remote_branch()
+    else:
+        # with --recent, only the branches up to the index need to be found in the reflog
+        branches = gith.git_branch(verbose=False, limit=int(index) if index.isdigit() else None)
+    if not index.isdigit():
+        branch_to_checkout = gith.find_branch(index, branches, remote)
+    else:
+        index = int(index)
+        if not 1 <= index <= len(branches):
+            GithMessage(f"There is no {'remote ' if remote else ''}branch with index {index}.", GithMessageLevel.ERROR)
+        branch_to_checkout = branches[index - 1]
+    remote_name = "origin"
+    if remote:
+        branch_to_checkout, remote_name = gith.track_branch(branch_to_checkout, verbose=not path_only)
+    if worktree is None:
+        worktree = read_config().get("worktree", {}).get("pool", "false").lower() in ("true", "yes", "on", "1")
+    if worktree or path_only:
+        gith.switch_worktree(branch_to_checkout, get_worktree_pool(), pull, path_only, remote_name)
+    else:
+        gith.switch_branch(branch_to_checkout, pull, remote_name)
+
+
+@app.command()
+def sync(
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only show the branches that would be updated, as of the last fetch. Nothing is fetched."
+    ),
 ):
     """
-    A helper command to checkout to a branch by its index.
+    Fast-forward every local branch to its upstream, with a single fetch and without touching the working tree.
     """
-    branches = gith.git_branch(verbose=False)
-    branch_to_checkout = branches[index - 1]
-    gith.checkout_to_branch(branch_to_checkout)
-    if pull:
-        gith.git_pull(branch_to_checkout)
+    gith.validate_git_repo()
+    gith.sync_branches(dry_run)
 
 
 @app.command()
 def repo(
     url: str = typer.Argument(None, help='URL of the repository to create. e.g: git@github.com:john/my_cool_project.git.'),
+    manifest: str = typer.Option(
+        None, "--manifest", "-m", help="File with one repository URL per line, optionally followed by its directory."
+    ),
+    jobs: int = typer.Option(None, "--jobs", "-j", help="Used with --manifest. Repositories set up at the same time."),
+    clone: bool = typer.Option(
+        False,
+        "--clone",
+        help="Clone the repository instead of only setting it up, partially with --filter, --depth and --sparse.",
+    ),
+    filter: str = typer.Option(
+        None,
+        "--filter",
+        help=(
+            "Used with --clone. Objects fetched only when needed. "
+            "Defaults to \\[repo] filter, or blob:none. Use none for a full clone."
+        ),
+    ),
+    depth: int = typer.Option(
+        None,
+        "--depth",
+        help="Used with --clone. Number of commits of history. Defaults to \\[repo] depth, or all of them.",
+    ),
+    sparse: List[str] = typer.Option(
+        None,
+        "--sparse",
+        help=(
+            "Used with --clone. Only check this directory out, repeat it for more. "
+            "Defaults to \\[repo] sparse. See gith sparse."
+        ),
+    ),
 ):
     """
     A helper command to create new Git repositories.
     """
+    repo_config = read_config().get('repo', {})
+    clone_options = get_clone_options(repo_config, filter, depth, sparse) if clone else None
+    if manifest:
+        from .multi import GithMultiRepo, init_repo
+
+        try:
+            urls = GithMultiRepo.read_manifest(manifest)
+        except OSError as e:
+            GithMessage(f"Error reading manifest: {e}", GithMessageLevel.ERROR)
+        if not urls:
+            GithMessage(f"No repositories found in {manifest}.", GithMessageLevel.ERROR)
+        jobs = jobs or int(repo_config.get("jobs", 8))
+        GithMultiRepo(list(urls), jobs).run(init_repo(urls, repo_config, read_config().get("performance"), clone_options))
+        return
+    if not url:
+        GithMessage("Use gith repo <url>, or gith repo --manifest <file> for many repositories.", GithMessageLevel.ERROR)
+    # errors are reported by create_repo
+    gith.create_repo(url, repo_config, read_config().get("performance"), clone_options)
+
+
+def get_clone_options(repo_config: dict, filter: str = None, depth: int = None, sparse: List[str] = None) -> dict:
+    """
+    Returns the options of GithHelper.clone_repo, from the command line or the [repo] section of gith.conf.
+    """
+    filter = filter or repo_config.get("filter", "blob:none")
+    depth = depth or repo_config.get("depth")
+    sparse = sparse or [path.strip() for path in repo_config.get("sparse", "").split(",") if path.strip()]
+    return {"filter": None if filter == "none" else filter, "depth": int(depth) if depth else None, "sparse": sparse}
+
+
+@sparse_app.command("add")
+def sparse_add(
+    paths: List[str] = typer.Argument(..., help="Directories to check out, e.g: src/app docs."),
+):
+    """
+    Check more directories out in a sparse clone. Their files are fetched now if the clone is partial.
+    """
+    gith.validate_git_repo()
+    result = gith.run_git_progress(["sparse-checkout", "add", "--", *paths])
+    if result.returncode != 0:
+        GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+    for path in paths:
+        gith.report(f"Checked out [green]{path}[/green]", "sparse_added", path=path)
+
+
+@sparse_app.command("list")
+def sparse_list():
+    """
+    List the directories checked out in a sparse clone.
+    """
+    gith.validate_git_repo()
+    result = gith.run_git(["sparse-checkout", "list"])
+    if result.returncode != 0:
+        GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+    for path in result.stdout.splitlines():
+        gith.report(path, "sparse_path", path=path)
+
+
+@app.command()
+def tune():
+    """
+    Turn on the git settings of the \\[performance] section of gith.conf and compare git status before and after.
+    """
+    from .helpers import GithRepoError
+    from .performance import GithPerformance
+
+    gith.validate_git_repo()
+    profile = GithPerformance(read_config().get("performance"))
+    before = profile.time_status()
     try:
-        gith.create_repo(url, config.get('repo', {}))
-    except Exception as e:
-        GithMessage(e, GithMessageLevel.ERROR)
+        changed = profile.apply()
+    except GithRepoError as e:
+        GithMessage(f"{e}", GithMessageLevel.ERROR)
+    settings = profile.settings()
+    for key in changed:
+        gith.report(f"Set [green]{key}[/green] = {settings[key]}", "setting", key=key, value=settings[key])
+    if not changed:
+        GithMessage("Every setting was already on.", GithMessageLevel.INFO)
+    if profile.enabled["fsmonitor"] and not profile.fsmonitor_available():
+        GithMessage(
+            "The file system monitor is not built into this git, so core.fsmonitor was skipped.", GithMessageLevel.INFO
+        )
+    error = profile.start_maintenance()
+    if error:
+        GithMessage(f"Unable to schedule git maintenance: {error}", GithMessageLevel.INFO)
+    elif profile.enabled["maintenance"]:
+        gith.report("Scheduled [green]git maintenance[/green]", "maintenance")
+    # the first run fills the untracked cache and starts the file system monitor
+    profile.time_status(runs=1)
+    after = profile.time_status()
+    gith.report(
+        f"git status: [yellow]{before * 1000:.1f} ms[/yellow] before, [green]{after * 1000:.1f} ms[/green] after",
+        "status_timing",
+        before_ms=round(before * 1000, 1),
+        after_ms=round(after * 1000, 1),
+    )
+
+
+@multi_app.callback()
+def multi(
+    ctx: typer.Context,
+    workspace: str = typer.Option(
+        None, "--workspace", "-w", help="File with one repository path per line. Defaults to \\[multi] workspace in gith.conf."
+    ),
+    glob: str = typer.Option(
+        None, "--glob", "-g", help="Glob of repository directories. Defaults to every repository in the current directory."
+    ),
+    jobs: int = typer.Option(None, "--jobs", "-j", help="Repositories processed at the same time. Defaults to 8."),
+):
+    """
+    Run branch, checkout and pull operations on many repositories in parallel.
+    """
+    from .multi import GithMultiRepo
+
+    multi_config = read_config().get("multi", {})
+    workspace = workspace or (None if glob else multi_config.get("workspace"))
+    jobs = jobs or int(multi_config.get("jobs", 8))
+    try:
+        repos = GithMultiRepo.discover(os.path.expanduser(workspace) if workspace else None, glob)
+    except OSError as e:
+        GithMessage(f"Error reading workspace: {e}", GithMessageLevel.ERROR)
+    ctx.obj = GithMultiRepo(repos, jobs)
+
+
+@multi_app.command("list")
+def multi_list(ctx: typer.Context):
+    """
+    List the local branches of every repository.
+    """
+    from . import multi
+
+    ctx.obj.run(multi.list_branches)
+
+
+@multi_app.command("checkout")
+def multi_checkout(
+    ctx: typer.Context,
+    branch_name: str = typer.Argument(..., help="Name of the branch to checkout to in every repository."),
+):
+    """
+    Checkout to a branch, by name, in every repository.
+    """
+    from . import multi
+
+    ctx.obj.run(multi.checkout_branch(branch_name))
+
+
+@multi_app.command("keep")
+def multi_keep(
+    ctx: typer.Context,
+    keep: str = typer.Argument(..., help="Comma-separated names of the branches to keep, e.g: main,develop."),
+    atomic: bool = typer.Option(
+        False, "--atomic", help="Delete nothing in a repository if any of its branches can not be deleted."
+    ),
+):
+    """
+    Keep the given branches, by name, and delete the rest in every repository. The current branch is always kept.
+    """
+    from . import multi
+
+    ctx.obj.run(multi.keep_branches([name.strip() for name in keep.split(",") if name.strip()], atomic))
+
+
+@multi_app.command("pull")
+def multi_pull(ctx: typer.Context):
+    """
+    Pull the current branch of every repository from origin.
+    """
+    from . import multi
+
+    ctx.obj.run(multi.pull)
+
+
+@daemon_app.command("start")
+def daemon_start():
+    """
+    Start the gith daemon in the background.
+    """
+    from . import daemon
+
+    if daemon.start():
+        GithMessage("gith daemon is [green]running[/green].", GithMessageLevel.LOG)
+    else:
+        GithMessage("Unable to start the gith daemon.", GithMessageLevel.ERROR)
+
+
+@daemon_app.command("stop")
+def daemon_stop():
+    """
+    Stop the gith daemon.
+    """
+    from . import daemon
+
+    if daemon.stop():
+        GithMessage("gith daemon [green]stopped[/green].", GithMessageLevel.LOG)
+    else:
+        GithMessage("gith daemon is not running.", GithMessageLevel.INFO)
+
+
+@daemon_app.command("status")
+def daemon_status():
+    """
+    Show whether the gith daemon is running.
+    """
+    from . import daemon
+
+    status = "[green]running[/green]" if daemon.is_running() else "[red]not running[/red]"
+    GithMessage(f"gith daemon is {status}.", GithMessageLevel.LOG)
+
+
+@daemon_app.command("run")
+def daemon_run():
+    """
+    Run the gith daemon in the foreground.
+    """
+    from . import daemon
+
+    daemon.serve()
+
+
+def get_hooks_dir() -> str:
+    """
+    Returns the hooks directory of the current repository, honoring core.hooksPath.
+    """
+    result = gith.run_git(["rev-parse", "--path-format=absolute", "--git-path", "hooks"])
+    if result.returncode != 0:
+        GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+    return result.stdout.strip()
+
+
+@completion_app.command("install")
+def completion_install():
+    """
+    Install the git hooks keeping the completion file of the current repository up to date.
+    """
+    from . import completion
+    from .refs import GithRefsError
+
+    gith.validate_git_repo()
+    try:
+        completion.refresh()
+    except (GithRefsError, OSError) as e:
+        GithMessage(f"Unable to write the completion file: {e}", GithMessageLevel.ERROR)
+    installed, skipped = completion.install_hooks(get_hooks_dir())
+    for name in installed:
+        GithMessage(f"Installed [green]{name}[/green] hook.", GithMessageLevel.LOG)
+    if skipped:
+        GithMessage(
+            "These hooks already exist and were not changed: " + ", ".join(skipped) + ".\n"
+            f"Add this line to them to keep completion up to date: {sys.executable} -m gith.completion",
+            GithMessageLevel.INFO,
+        )
+    GithMessage(
+        "Load the completion script in your shell, e.g: [green]eval \"$(gith completion script bash)\"[/green]",
+        GithMessageLevel.LOG,
+    )
+
+
+@completion_app.command("uninstall")
+def completion_uninstall():
+    """
+    Remove the git hooks installed by gith and the completion files of the current repository.
+    """
+    from . import completion
+    from .refs import GithRefs, GithRefsError
+
+    gith.validate_git_repo()
+    for name in completion.uninstall_hooks(get_hooks_dir()):
+        GithMessage(f"Removed [green]{name}[/green] hook.", GithMessageLevel.LOG)
+    try:
+        completion.remove_files(GithRefs())
+    except (GithRefsError, OSError) as e:
+        GithMessage(f"Unable to remove the completion files: {e}", GithMessageLevel.ERROR)
+
+
+@completion_app.command("refresh")
+def completion_refresh():
+    """
+    Write the completion file of the current repository, as the hooks do.
+    """
+    from . import completion
+    from .refs import GithRefsError
+
+    gith.validate_git_repo()
+    try:
+        completion.refresh()
+    except (GithRefsError, OSError) as e:
+        GithMessage(f"Unable to write the completion file: {e}", GithMessageLevel.ERROR)
+
+
+@completion_app.command("script")
+def completion_script(
+    shell: str = typer.Argument("bash", help="Shell to print the completion script for: bash, zsh or fish."),
+):
+    """
+    Print the completion script for a shell. Branch indexes are read from the completion file,
+    everything else is completed by gith as with --install-completion.
+    """
+    from .completion import SCRIPTS
+
+    if shell not in SCRIPTS:
+        GithMessage(f"Unsupported shell {shell}. Use one of: {', '.join(SCRIPTS)}.", GithMessageLevel.ERROR)
+    typer.echo(SCRIPTS[shell], nl=False)
+
+
+def get_worktree_pool():
+    """
+    Returns the worktree pool of the current repository, configured by the [worktree] section of gith.conf.
+    """
+    from .refs import GithRefs, GithRefsError
+    from .worktrees import GithWorktreePool
+
+    gith.validate_git_repo()
+    worktree_config = read_config().get("worktree", {})
+    try:
+        return GithWorktreePool(GithRefs(), worktree_config.get("dir"), int(worktree_config.get("size", 5)))
+    except GithRefsError as e:
+        GithMessage(f"{e}", GithMessageLevel.ERROR)
+
+
+@worktree_app.command("list")
+def worktree_list():
+    """
+    List the worktrees of the pool, most recently used first.
+    """
+    pool = get_worktree_pool()
+    rows = [
+        {"data": [str(index), entry["branch"] or "(detached)", entry["path"]], "style": "default"}
+        for index, entry in enumerate(pool.entries(), start=1)
+    ]
+    if not rows:
+        GithMessage(f"The worktree pool in {pool.directory} is empty.", GithMessageLevel.INFO)
+        return
+    columns = [
+        {"name": "Index", "justify": "right"},
+        {"name": "Branch Name", "justify": "left"},
+        {"name": "Path", "justify": "left"},
+    ]
+    console.print_table(columns, rows)
+
+
+@worktree_app.command("prune")
+def worktree_prune(
+    keep: int = typer.Option(
+        None, "--keep", help="Number of worktrees to keep. Defaults to \\[worktree] size in gith.conf."
+    ),
+    all: bool = typer.Option(False, "--all", help="Remove every worktree of the pool."),
+    force: bool = typer.Option(False, "--force", help="Remove worktrees with local changes too."),
+):
+    """
+    Remove the least recently used worktrees of the pool, beyond its size.
+    """
+    pool = get_worktree_pool()
+    removed, failed = pool.prune(0 if all else keep, force)
+    for path in removed:
+        gith.report(f"Removed worktree [green]{path}[/green].", "worktree_removed", path=path)
+    for path, error in failed.items():
+        GithMessage(f"Unable to remove worktree {path}: {error}", GithMessageLevel.INFO)
+    if not removed and not failed:
+        GithMessage("Nothing to prune.", GithMessageLevel.INFO)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+"""
+Entry point of the `gith` command.
+
+When `gith daemon` is running, `branch` and `checkout` commands and shell completion are sent to it
+over a Unix socket, so this process does not need to import Typer, Rich or the rest of gith.
+Anything else, or any problem reaching the daemon, runs the command in this process as usual.
+Only the standard library is imported before deciding.
+"""
+import json
+import os
+import socket
+import stat
+import sys
+
+SERVED_COMMANDS = ("branch", "checkout")
+# global options that do not change how a command is served
+SERVED_OPTIONS = ("--json", "--porcelain")
+COMPLETION_VAR = "_GITH_COMPLETE"
+# environment a command needs in the daemon: git, locale, terminal, pager and completion.
+# SSH_AUTH_SOCK is needed to pull over SSH. Anything else, like tokens, stays in the client.
+FORWARDED_ENV = (
+    "PATH", "HOME", "USER", "LOGNAME", "SHELL", "LANG", "TZ", "TERM", "COLUMNS", "LINES", "NO_COLOR",
+    "FORCE_COLOR", "PAGER", "LESS", "EDITOR", "VISUAL", "XDG_CONFIG_HOME", "SSH_AUTH_SOCK", "COMP_WORDS",
+    "COMP_CWORD",
+)
+FORWARDED_PREFIXES = ("GIT_", "GITH_", "_GITH_", "_TYPER_", "LC_")
+
+
+def socket_path() -> str:
+    """
+    Returns the path of the daemon socket for the current user.
+    """
+    # tempfile.gettempdir() would cost more than the rest of the client
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(runtime_dir, f"gith-{os.getuid()}", "daemon.sock")
+
+
+def check_socket_dir(path: str) -> None:
+    """
+    Raise PermissionError unless the directory of the socket belongs to the current user and only they
+    can access it. Without XDG_RUNTIME_DIR it is in /tmp, where another user could create it first.
+
+    Args:
+        path (str): Path of the daemon socket
+    """
+    directory = os.path.dirname(path)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{directory} must be a directory of the current user with mode 0700.")
+
+
+def forwarded_env(environ: dict) -> dict:
+    """
+    Returns the environment variables sent to the daemon with a command, see FORWARDED_ENV.
+
+    Args:
+        environ (dict): Environment of the client
+    """
+    return {
+        key: value for key, value in environ.items() if key in FORWARDED_ENV or key.startswith(FORWARDED_PREFIXES)
+    }
+
+
+def send(message: dict, timeout: float = None) -> dict:
+    """
+    Send a message to the daemon and return its answer.
+
+    Raises OSError if the daemon is not running, or its socket is not private to the user.
+
+    Args:
+        message (dict): JSON serializable request
+        timeout (float, optional): Seconds to wait for the daemon. Defaults to None (no limit).
+    """
+    path = socket_path()
+    check_socket_dir(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(path)
+        client.sendall(json.dumps(message).encode("utf-8"))
+        client.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks).decode("utf-8"))
+
+
+def served_by_daemon(argv: list[str]) -> bool:
+    """
+    Whether the command can be sent to the daemon.
+
+    Args:
+        argv (list[str]): Arguments of gith, without the program name
+    """
+    if os.environ.get("GITH_NO_DAEMON") or os.environ.get("GITH_PROFILE"):
+        return False
+    if COMPLETION_VAR in os.environ:
+        return True
+    commands = [arg for arg in argv if arg not in SERVED_OPTIONS]
+    return bool(commands) and commands[0] in SERVED_COMMANDS
+
+
+def run_in_daemon(argv: list[str]):
+    """
+    Run the command in the daemon and return its exit code, or None if the daemon is not available.
+
+    Args:
+        argv (list[str]): Arguments of gith, without the program name
+    """
+    try:
+        columns = os.get_terminal_size(sys.stdout.fileno()).columns
+    except (OSError, ValueError):
+        columns = None
+    request = {
+        "command": "run",
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": forwarded_env(os.environ),
+        "columns": columns,
+        "isatty": sys.stdout.isatty(),
+    }
+    try:
+        response = send(request)
+    except (OSError, ValueError):
+        return None
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return response.get("exit_code", 1)
+
+
+def main() -> None:
+    """Run gith, in the daemon when possible."""
+    argv = sys.argv[1:]
+    if served_by_daemon(argv):
+        exit_code = run_in_daemon(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    from .cli import app
+
+    app(prog_name="gith")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Shell completion of branch indexes without starting Python.
+
+`gith completion install` adds git hooks that write the numbered branch list of the repository to
+a plain text file (`<git dir>/gith-completion`, one `<index>\\t<branch>` line per branch) every time
+a branch is created, deleted or checked out. The scripts printed by `gith completion script`
+read that file directly from the shell, and only fall back to the Typer completion, which runs gith,
+for everything else or when the file does not exist.
+
+This module only imports the standard library, so the hooks stay cheap: `python -m gith.completion`.
+"""
+import os
+import shlex
+import stat
+import sys
+
+from .config import read_config
+from .refs import GithRefs, GithRefsError, atomic_write
+
+FILE_NAME = "gith-completion"
+HOOK_MARKER = "# installed by gith"
+HOOKS = {
+    "post-checkout": (
+        '# only branch switches change the indexes\n'
+        '[ "$3" = 1 ] || exit 0\n'
+    ),
+    "reference-transaction": (
+        '# only created or deleted local branches change the indexes, not commits, pulls or rebases:\n'
+        '# their old or new object id is all zeros\n'
+        '[ "$1" = committed ] || exit 0\n'
+        "grep -E '^0+ [0-9a-f]+ refs/heads/|^[0-9a-f]+ 0+ refs/heads/' >/dev/null || exit 0\n"
+    ),
+}
+# installed by older versions, removed on install and uninstall
+OLD_HOOKS = ("post-merge",)
+
+SHELL_FIND_FILE = r'''_gith_completion_file() {
+    # find the completion file of the repository in the current directory, without running git
+    _GITH_FILE=""
+    local dir="$PWD" gitdir=""
+    while true; do
+        if [ -d "$dir/.git" ]; then
+            gitdir="$dir/.git"
+        elif [ -f "$dir/.git" ]; then
+            read -r gitdir < "$dir/.git"
+            gitdir="${gitdir#gitdir: }"
+            [ "${gitdir#/}" = "$gitdir" ] && gitdir="$dir/$gitdir"
+        fi
+        if [ -n "$gitdir" ]; then
+            [ -r "$gitdir/gith-completion" ] && _GITH_FILE="$gitdir/gith-completion"
+            return 0
+        fi
+        [ -z "$dir" ] && return 0
+        dir="${dir%/*}"
+    done
+}
+'''
+
+SCRIPTS = {
+    "bash": SHELL_FIND_FILE + r'''
+_gith_wants_index() {
+    local word command=""
+    case "${COMP_WORDS[COMP_CWORD-1]}" in
+        -d|--delete|-k|--keep|-f|--from) return 0 ;;
+    esac
+    for word in "${COMP_WORDS[@]:1:COMP_CWORD-1}"; do
+        # remote and --recent branch indexes are not in the file
+        case "$word" in -r|--remote|--recent) return 1 ;; esac
+    done
+    for word in "${COMP_WORDS[@]:1:COMP_CWORD-1}"; do
+        case "$word" in -*) ;; *) command="$word"; break ;; esac
+    done
+    [ "$command" = checkout ] && [ "${COMP_WORDS[COMP_CWORD]#-}" = "${COMP_WORDS[COMP_CWORD]}" ]
+}
+
+_gith_fast_completion() {
+    local cur="${COMP_WORDS[COMP_CWORD]}" index name
+    local -a matches=()
+    if _gith_wants_index; then
+        _gith_completion_file
+        if [ -n "$_GITH_FILE" ]; then
+            while IFS=$'\t' read -r index name; do
+                case "$index" in "$cur"*) matches+=("$index -> $name") ;; esac
+            done < "$_GITH_FILE"
+            if [ "${#matches[@]}" -eq 1 ]; then
+                COMPREPLY=("${matches[0]%% *}")
+            else
+                COMPREPLY=("${matches[@]}")
+            fi
+            return 0
+        fi
+    fi
+    local IFS=$'\n'
+    COMPREPLY=( $( env COMP_WORDS="${COMP_WORDS[*]}" COMP_CWORD=$COMP_CWORD _GITH_COMPLETE=complete_bash "$1" ) )
+    return 0
+}
+
+complete -o default -F _gith_fast_completion gith
+''',
+    "zsh": "#compdef gith\n\n" + SHELL_FIND_FILE + r'''
+_gith_wants_index() {
+    local word command=""
+    case "${words[CURRENT-1]}" in
+        -d|--delete|-k|--keep|-f|--from) return 0 ;;
+    esac
+    for word in "${(@)words[2,CURRENT-1]}"; do
+        # remote and --recent branch indexes are not in the file
+        case "$word" in -r|--remote|--recent) return 1 ;; esac
+    done
+    for word in "${(@)words[2,CURRENT-1]}"; do
+        case "$word" in -*) ;; *) command="$word"; break ;; esac
+    done
+    [[ "$command" = checkout && "${words[CURRENT]}" != -* ]]
+}
+
+_gith_fast_completion() {
+    local index name
+    local -a entries
+    if _gith_wants_index; then
+        _gith_completion_file
+        if [[ -n "$_GITH_FILE" ]]; then
+            while IFS=$'\t' read -r index name; do
+                entries+=("$index:$name")
+            done < "$_GITH_FILE"
+            _describe -V 'branch index' entries
+            return
+        fi
+    fi
+    eval $(env _TYPER_COMPLETE_ARGS="${words[1,$CURRENT]}" _GITH_COMPLETE=complete_zsh gith)
+}
+
+compdef _gith_fast_completion gith
+''',
+    "fish": r'''function __gith_completion_file
+    # find the completion file of the repository in the current directory, without running git
+    set -l dir $PWD
+    while true
+        set -l gitdir
+        if test -d $dir/.git
+            set gitdir $dir/.git
+        else if test -f $dir/.git
+            read -l line < $dir/.git
+            set gitdir (string replace -r '^gitdir: ' '' -- $line)
+            string match -q -- '/*' $gitdir; or set gitdir $dir/$gitdir
+        end
+        if test -n "$gitdir"
+            test -r $gitdir/gith-completion; or return 1
+            echo $gitdir/gith-completion
+            return 0
+        end
+        test -z "$dir"; and return 1
+        set dir (string replace -r '/[^/]*$' '' -- $dir)
+    end
+end
+
+function __gith_wants_index
+    set -l tokens (commandline -opc)
+    # remote and --recent branch indexes are not in the file
+    contains -- -r $tokens; or contains -- --remote $tokens; or contains -- --recent $tokens; and return 1
+    contains -- $tokens[-1] -d --delete -k --keep -f --from; and return 0
+    for token in $tokens[2..-1]
+        if not string match -q -- '-*' $token
+            test $token = checkout
+            return
+        end
+    end
+    return 1
+end
+
+function __gith_indexes
+    set -l file (__gith_completion_file)
+    while read -l line
+        echo $line
+    end < $file
+end
+
+complete --erase --command gith
+complete --command gith --no-files --arguments "(__gith_indexes)" \
+    --condition "__gith_wants_index; and __gith_completion_file >/dev/null"
+complete --command gith --no-files \
+    --arguments "(env _GITH_COMPLETE=complete_fish _TYPER_COMPLETE_FISH_ACTION=get-args _TYPER_COMPLETE_ARGS=(commandline -cp) gith)" \
+    --condition "not begin; __gith_wants_index; and __gith_completion_file >/dev/null; end; and env _GITH_COMPLETE=complete_fish _TYPER_COMPLETE_FISH_ACTION=is-args _TYPER_COMPLETE_ARGS=(commandline -cp) gith"
+''',
+}
+
+
+def branch_list(refs: GithRefs) -> list[str]:
+    """
+    Returns the numbered branch list of a worktree, in the same order as `gith branch`.
+
+    Args:
+        refs (GithRefs): Reader of the worktree refs
+    """
+    from .cache import GithBranchCache
+
+    branches = GithBranchCache(refs).branches()
+    if read_config().get("branch", {}).get("order") == "recent":
+        branches = refs.order_by_recent(branches)
+    return branches
+
+
+def write_file(refs: GithRefs) -> None:
+    """
+    Write the completion file of a worktree, replacing the previous one at once.
+
+    Args:
+        refs (GithRefs): Reader of the worktree refs
+    """
+    path = os.path.join(refs.git_dir, FILE_NAME)
+    lines = [f"{index}\t{name}\n" for index, name in enumerate(branch_list(refs), start=1)]
+    atomic_write(path, "".join(lines))
+
+
+def refresh(path: str = None) -> None:
+    """
+    Write the completion file of every worktree of the repository.
+
+    Branches are shared by all the worktrees, so a change in one of them changes the indexes of the others.
+
+    Args:
+        path (str, optional): Any path inside the repository. Defaults to the current directory.
+    """
+    refs = GithRefs(path)
+    write_file(refs)
+    # hooks run with GIT_DIR set to the worktree that changed
+    os.environ.pop("GIT_DIR", None)
+    for git_dir, worktree in refs.worktrees():
+        if os.path.normpath(git_dir) == os.path.normpath(refs.git_dir):
+            continue
+        if os.path.exists(os.path.join(worktree, ".git")):
+            write_file(GithRefs(worktree))
+
+
+def remove_files(refs: GithRefs) -> None:
+    """
+    Remove the completion file of every worktree of the repository.
+
+    Args:
+        refs (GithRefs): Reader of the repository refs
+    """
+    for git_dir, _ in [(refs.git_dir, None)] + refs.worktrees():
+        try:
+            os.remove(os.path.join(git_dir, FILE_NAME))
+        except FileNotFoundError:
+            pass
+
+
+def hook_script(name: str) -> str:
+    """
+    Returns the content of a hook refreshing the completion files.
+
+    Args:
+        name (str): Name of the hook, one of HOOKS
+    """
+    return (
+        f"#!/bin/sh\n{HOOK_MARKER}: keeps the branch indexes used by shell completion up to date\n"
+        f"{HOOKS[name]}"
+        f"python={shlex.quote(sys.executable)}\n"
+        '[ -x "$python" ] && "$python" -m gith.completion >/dev/null 2>&1 && exit 0\n'
+        "# gith can not run anymore, e.g: its virtualenv was upgraded. Remove the files instead of\n"
+        "# leaving wrong indexes behind, so completion falls back to gith\n"
+        'common="$(git rev-parse --git-common-dir)" || exit 0\n'
+        f'rm -f "$common/{FILE_NAME}" "$common"/worktrees/*/{FILE_NAME}\n'
+        "exit 0\n"
+    )
+
+
+def install_hooks(hooks_dir: str) -> tuple[list[str], list[str]]:
+    """
+    Install the hooks in hooks_dir. Hooks not installed by gith are never overwritten.
+
+    Returns the installed hooks and the ones skipped because another hook exists.
+
+    Args:
+        hooks_dir (str): Directory of the repository hooks
+    """
+    os.makedirs(hooks_dir, exist_ok=True)
+    uninstall_hooks(hooks_dir, OLD_HOOKS)
+    installed, skipped = [], []
+    for name in HOOKS:
+        path = os.path.join(hooks_dir, name)
+        if os.path.exists(path) and not is_gith_hook(path):
+            skipped.append(name)
+            continue
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(hook_script(name))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        installed.append(name)
+    return installed, skipped
+
+
+def uninstall_hooks(hooks_dir: str, names: tuple = (*HOOKS, *OLD_HOOKS)) -> list[str]:
+    """
+    Remove the hooks installed by gith from hooks_dir. Returns the removed hooks.
+
+    Args:
+        hooks_dir (str): Directory of the repository hooks
+        names (tuple, optional): Names of the hooks to remove. Defaults to every hook gith installs or installed.
+    """
+    removed = []
+    for name in names:
+        path = os.path.join(hooks_dir, name)
+        if os.path.exists(path) and is_gith_hook(path):
+            os.remove(path)
+            removed.append(name)
+    return removed
+
+
+def is_gith_hook(path: str) -> bool:
+    """
+    Whether the hook at path was installed by gith.
+
+    Args:
+        path (str): Path of the hook
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            return HOOK_MARKER in file.read()
+    except OSError:
+        return False
+
+
+def main() -> None:
+    """Refresh the completion files, as run by the hooks. Never fails, so git is not affected.
+
+    If the refs can not be read without git, the files are removed, so the shell falls back to gith.
+    """
+    try:
+        refresh()
+    except (GithRefsError, OSError):
+        try:
+            remove_files(GithRefs())
+        except (GithRefsError, OSError):
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def read_config():
+    """
+    Read ~/gith.conf once, the first time a command needs it.
+    """
+    config_path = os.path.join(os.path.expanduser("~"), "gith.conf")
+    if os.path.exists(config_path):
+        import configparser
+
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        return {section: dict(config.items(section)) for section in config.sections()}
+    return {}
@@ -1,6 +1,11 @@
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
+import atexit
+import contextlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
 
 
 class GithConsole:
@@ -8,18 +13,133 @@ class GithConsole:
     
     This class provides methods for printing formatted messages, panels, and tables
     using the Rich library's features for enhanced terminal output.
+
+    A single instance (`console`) is shared by the whole process. Regular messages are
+    buffered and written in batches, while panels and tables are written immediately,
+    after flushing the pending messages to keep the output in order.
+
+    In JSON output mode (`gith --json`), Rich is never used: every message, panel and table row
+    is written as one JSON object per line to standard output instead.
     """
+    BATCH_SIZE = 500
+    MARKUP = re.compile(r"(\\)?\[(/?[a-z#][^\[\]]*)\]")
+
     def __init__(self):
-        """Initialize a new GithConsole instance with a Rich console object."""
-        self.console = Console()
+        """Initialize a new GithConsole instance. The Rich console object is created on first use."""
+        self._console = None
+        self._buffer = []
+        self.json = False
+        atexit.register(self.flush)
+
+    @property
+    def console(self):
+        """The Rich console object, created on first use."""
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return self._console
+
+    @contextlib.contextmanager
+    def redirect(self, file, width: int = None, force_terminal: bool = None):
+        """Temporarily write everything to another file, e.g. for a client of `gith daemon`.
+
+        Args:
+            file: Text file to write to
+            width (int, optional): Width of the output. Defaults to the detected width
+            force_terminal (bool, optional): Render colors and styles as for a terminal. Defaults to None
+        """
+        from rich.console import Console
+
+        self.flush()
+        previous = self._console
+        self._console = Console(file=file, width=width, force_terminal=force_terminal)
+        try:
+            yield
+        finally:
+            self.flush()
+            self._console = previous
+
+    @contextlib.contextmanager
+    def pager(self):
+        """Send everything printed inside the block to a pager, when writing to a terminal.
+
+        The pager is GITH_PAGER, PAGER or `less` (with LESS=FRX by default, so it exits when
+        the output fits in one screen). Lines reach the pager as they are printed.
+        """
+        if self.json or not sys.stdout.isatty():
+            yield
+            return
+        env = dict(os.environ)
+        env.setdefault("LESS", "FRX")
+        command = env.get("GITH_PAGER") or env.get("PAGER") or "less"
+        try:
+            process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, env=env, text=True)
+        except (OSError, ValueError):
+            yield
+            return
+        try:
+            with self.redirect(process.stdin, width=self.console.width, force_terminal=True):
+                yield
+            process.stdin.close()
+        except BrokenPipeError:
+            # the user quit the pager before the end of the output
+            self._buffer = []
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            process.wait()
+
+    def emit(self, record_type: str, **fields) -> None:
+        """Write a record as a line of JSON to standard output, e.g: {"type": "branch", "index": 1, ...}.
+
+        Args:
+            record_type (str): Value of the "type" field of the record
+            **fields: Other fields of the record
+        """
+        sys.stdout.write(json.dumps({"type": record_type, **fields}) + "\n")
+        # a pipe is block-buffered: readers get every record as soon as it is known
+        sys.stdout.flush()
+
+    @classmethod
+    def plain(cls, message: str) -> str:
+        """Returns the message without Rich markup, e.g: "[green]main[/green]" -> "main".
+
+        Args:
+            message (str): Message with Rich markup
+        """
+        return cls.MARKUP.sub(lambda match: f"[{match.group(2)}]" if match.group(1) else "", message).strip()
 
     def print_message(self, message: str) -> None:
         """Print a regular message to the console.
         
+        Plain strings are buffered until BATCH_SIZE messages are pending, a panel or table
+        is printed, flush is called or the program exits.
+
         Args:
             message (str): The message to print
         """
-        self.console.print(message)
+        if self.json:
+            self.emit("message", level="log", message=self.plain(f"{message}"))
+            return
+        if not isinstance(message, str):
+            self.flush()
+            self.console.print(message)
+            return
+        self._buffer.append(message)
+        if len(self._buffer) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all the buffered messages to the console at once."""
+        if self.json:
+            sys.stdout.flush()
+            return
+        if self._buffer:
+            messages, self._buffer = self._buffer, []
+            self.console.print("\n".join(messages))
 
     def print_panel(
         self,
@@ -36,9 +156,15 @@ class GithConsole:
             border_style (str, optional): The color/style of the panel border. Defaults to "default"
             title_align (str, optional): Title alignment ("left", "center", "right"). Defaults to "left"
         """
+        if self.json:
+            self.emit("message", level=title.lower(), message=self.plain(message))
+            return
+        from rich.panel import Panel
+
         panel = Panel(
             message, title=title, border_style=border_style, title_align=title_align
         )
+        self.flush()
         self.console.print(panel)
 
     def print_table(self, columns: list[dict], rows: list[dict]):
@@ -66,7 +192,16 @@ class GithConsole:
                     {"data": ["value1", "value2"], "style": "green"},
                     {"data": ["value3", "value4"], "style": "red"},
                 ]
+
+        In JSON output mode, every row is written as a "row" record with the column names as keys.
         """
+        if self.json:
+            names = [column.get("name") for column in columns]
+            for row in rows:
+                self.emit("row", **dict(zip(names, row["data"])))
+            return
+        from rich.table import Table
+
         table = Table()
 
         # Add columns to the table
@@ -83,3 +218,6 @@ class GithConsole:
             table.add_row(*row["data"], style=row.get("style", "default"))
 
         self.print_message(table)
+
+
+console = GithConsole()
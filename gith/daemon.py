@@ -0,0 +1,168 @@
+"""
+Long-lived gith server used by the thin client in gith.client.
+
+The daemon keeps the interpreter, Typer, Rich and the in-memory branch snapshots warm, and runs
+the requests one at a time, in the working directory and environment of the client.
+Branch snapshots are revalidated on every request by checking the mtimes of the ref files,
+so the answers are always the same as running gith in-process.
+"""
+import contextlib
+import io
+import json
+import os
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+from .client import check_socket_dir, forwarded_env, send, socket_path
+from .console import console
+
+
+class GithRequestHandler(socketserver.StreamRequestHandler):
+    """Handle a single JSON request from the client."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.read().decode("utf-8"))
+        except ValueError:
+            return
+        if request.get("command") == "stop":
+            response = {"stopped": True}
+            # shutdown() waits for the serving loop, which is waiting for this handler
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif request.get("command") == "ping":
+            response = {"pid": os.getpid()}
+        else:
+            response = self.run(request)
+        self.wfile.write(json.dumps(response).encode("utf-8"))
+
+    def run(self, request: dict) -> dict:
+        """
+        Run a gith command as if it was started by the client.
+
+        Args:
+            request (dict): argv, cwd, env, columns and isatty of the client
+        """
+        from .cli import app, read_config
+
+        # the configuration file may have changed since the last request
+        read_config.cache_clear()
+        console.json = False
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        previous_cwd = os.getcwd()
+        previous_env = dict(os.environ)
+        exit_code = 0
+        try:
+            os.chdir(request["cwd"])
+            # the client only sends what a command needs, see gith.client.FORWARDED_ENV
+            own_env = forwarded_env(previous_env)
+            os.environ.clear()
+            os.environ.update({key: value for key, value in previous_env.items() if key not in own_env})
+            os.environ.update(forwarded_env(request["env"]))
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), console.redirect(
+                stdout, width=request.get("columns"), force_terminal=request.get("isatty")
+            ):
+                try:
+                    app(request["argv"], prog_name="gith")
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        except OSError as e:
+            stderr.write(f"{e}\n")
+            exit_code = 1
+        finally:
+            os.environ.clear()
+            os.environ.update(previous_env)
+            os.chdir(previous_cwd)
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+
+class GithDaemon(socketserver.UnixStreamServer):
+    """Unix socket server running gith requests sequentially."""
+
+    def __init__(self, path: str):
+        """
+        Bind the server to the given socket path, in a directory only accessible by the user.
+
+        Raises PermissionError if the directory already exists and belongs to another user or is
+        accessible by others.
+
+        Args:
+            path (str): Path of the Unix socket
+        """
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        check_socket_dir(path)
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, GithRequestHandler)
+
+
+def is_running() -> bool:
+    """
+    Whether a daemon is answering on the socket of the current user.
+    """
+    try:
+        send({"command": "ping"}, timeout=1)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def serve() -> None:
+    """
+    Run the daemon in the foreground until it is stopped.
+    """
+    path = socket_path()
+    # import everything a request needs before the first one arrives
+    from . import cli  # noqa: F401
+
+    with GithDaemon(path) as server:
+        try:
+            server.serve_forever(poll_interval=0.2)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def start() -> bool:
+    """
+    Start the daemon in the background and wait until it answers.
+
+    Returns whether the daemon is running.
+    """
+    if is_running():
+        return True
+    subprocess.Popen(
+        [sys.executable, "-m", "gith.daemon"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if is_running():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def stop() -> bool:
+    """
+    Stop the daemon. Returns whether a daemon was running.
+    """
+    try:
+        send({"command": "stop"}, timeout=1)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,298 @@
+import heapq
+import marshal
+import os
+from array import array
+from collections import Counter
+from typing import Optional
+
+from .refs import atomic_write
+
+
+class GithAmbiguousMatch(ValueError):
+    """Raised when a query matches several branches equally well."""
+
+    def __init__(self, query: str, matches: list[str], message: Optional[str] = None):
+        """
+        Args:
+            query (str): The query given by the user
+            matches (list[str]): Best matching branches, best first
+            message (str, optional): Explanation of the error. Defaults to None ("N branches match 'query'.")
+        """
+        super().__init__(message or f"{len(matches)} branches match '{query}'.")
+        self.query = query
+        self.matches = matches
+
+
+class GithTrigramIndex:
+    """Ranked fuzzy search of branch names, backed by a trigram index persisted in the repository.
+
+    Every branch gets an id, and every trigram (3 consecutive characters of the lowercased name) a list of
+    the ids of the branches containing it, stored as packed unsigned integers. A query only reads the lists
+    of its own trigrams, so it stays fast with hundreds of thousands of branches.
+
+    The index is kept in the Git directory shared by all worktrees and updated incrementally: new branches
+    are appended and deleted ones are only marked as removed, until they are too many and the index is
+    rebuilt. While the refs signature (see GithBranchCache.signature) does not change, the branch names
+    are not even compared. Indexes are also kept in memory for long-lived processes like `gith daemon`.
+    """
+
+    FILE_NAME = "gith-trigrams"
+    VERSION = 1
+    # rebuild when more than this fraction of the ids belong to deleted branches
+    REBUILD_RATIO = 0.5
+    # path -> (mtime_ns, index), shared by all the instances of the process
+    _memory = {}
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize an empty index.
+
+        Args:
+            path (str, optional): File the index is persisted to. Defaults to None (memory only).
+        """
+        self.path = path
+        self.signature = None
+        self.names = []
+        self._ids = {}
+        self.postings = {}
+        self.removed = 0
+
+    @property
+    def ids(self) -> dict[str, int]:
+        """Id of every indexed branch, built from the names on first use."""
+        if self._ids is None:
+            self._ids = {name: branch_id for branch_id, name in enumerate(self.names) if name is not None}
+        return self._ids
+
+    @classmethod
+    def open(
+        cls, git_dir: Optional[str], branches: list[str], signature: Optional[list] = None
+    ) -> "GithTrigramIndex":
+        """
+        Returns the index of the repository, up to date with the given branches.
+
+        Args:
+            git_dir (str, optional): Git directory shared by the worktrees. None to only build it in memory.
+            branches (list[str]): Current local branches
+            signature (list, optional): Signature of the refs the branches were read from. Defaults to None
+        """
+        path = os.path.join(git_dir, cls.FILE_NAME) if git_dir else None
+        index = cls._load(path) if path else None
+        index = index or cls(path)
+        if signature is not None and index.signature == signature:
+            return index
+        changed = index.update(branches)
+        if path and (changed or index.signature != signature):
+            index.signature = signature
+            index.save()
+        return index
+
+    @classmethod
+    def _load(cls, path: str) -> Optional["GithTrigramIndex"]:
+        """
+        Returns the persisted index, or None if there is none or it can not be read.
+
+        Args:
+            path (str): File the index is persisted to
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        memory = cls._memory.get(path)
+        if memory is not None and memory[0] == mtime:
+            return memory[1]
+        try:
+            with open(path, "rb") as file:
+                data = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return None
+        index = cls(path)
+        index.signature = data["signature"]
+        index.names = data["names"]
+        index._ids = None
+        index.removed = data["removed"]
+        # posting lists stay packed until a query or an update needs them
+        index.postings = data["postings"]
+        cls._memory[path] = (mtime, index)
+        return index
+
+    def save(self) -> None:
+        """Persist the index, replacing the previous file at once."""
+        data = {
+            "version": self.VERSION,
+            "signature": self.signature,
+            "names": self.names,
+            "removed": self.removed,
+            "postings": {
+                trigram: ids if isinstance(ids, bytes) else ids.tobytes() for trigram, ids in self.postings.items()
+            },
+        }
+        try:
+            atomic_write(self.path, marshal.dumps(data))
+            self._memory[self.path] = (os.stat(self.path).st_mtime_ns, self)
+        except OSError:
+            # the index is only an optimization
+            pass
+
+    @staticmethod
+    def trigrams(text: str) -> set[str]:
+        """
+        Returns the trigrams of a text, lowercased.
+
+        Args:
+            text (str): Branch name or query
+        """
+        text = text.lower()
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def _posting(self, trigram: str) -> array:
+        """
+        Returns the ids of the branches containing the trigram, unpacking them if needed.
+
+        Args:
+            trigram (str): A trigram
+        """
+        ids = self.postings.get(trigram)
+        if ids is None:
+            ids = self.postings[trigram] = array("I")
+        elif isinstance(ids, bytes):
+            packed, ids = ids, array("I")
+            ids.frombytes(packed)
+            self.postings[trigram] = ids
+        return ids
+
+    def update(self, branches: list[str]) -> bool:
+        """
+        Bring the index up to date with the given branches. Returns whether it changed.
+
+        Args:
+            branches (list[str]): Current local branches
+        """
+        current = set(branches)
+        added = [name for name in branches if name not in self.ids]
+        deleted = [name for name in self.ids if name not in current]
+        if not added and not deleted:
+            return False
+        if (self.removed + len(deleted)) > self.REBUILD_RATIO * (len(self.names) + len(added)):
+            self.names, self._ids, self.postings, self.removed = [], {}, {}, 0
+            added = list(branches)
+        else:
+            for name in deleted:
+                self.names[self.ids.pop(name)] = None
+            self.removed += len(deleted)
+        for name in added:
+            branch_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = branch_id
+            for trigram in self.trigrams(name):
+                self._posting(trigram).append(branch_id)
+        return True
+
+    def search(self, query: str, limit: int = 10) -> list[str]:
+        """
+        Returns the branches best matching the query, best first.
+
+        Branches containing the query come first: the ones equal to it, starting with it, containing it
+        after a separator (/, -, _ or .) and anywhere else. Then, to tolerate typos, the ones sharing the
+        most trigrams with it. Ties are broken by the shortest name.
+
+        Args:
+            query (str): Text to look for
+            limit (int, optional): Maximum number of results. Defaults to 10.
+        """
+        lowered = query.lower()
+        trigrams = self.trigrams(lowered)
+        if not trigrams:
+            # too short for trigrams: a plain scan is fast enough
+            candidates = [name for name in self.ids if lowered in name.lower()]
+            return heapq.nsmallest(limit, candidates, key=lambda name: self._rank(name, lowered))
+        lists = sorted((self.postings.get(trigram, b"") for trigram in trigrams), key=self._count)
+        matches = []
+        if lists[0]:
+            candidates = set(self._unpack(lists[0]))
+            for ids in lists[1:]:
+                candidates.intersection_update(self._unpack(ids))
+                if not candidates:
+                    break
+            names = (self.names[branch_id] for branch_id in candidates)
+            matches = [name for name in names if name is not None and lowered in name.lower()]
+        if len(matches) >= limit:
+            return heapq.nsmallest(limit, matches, key=lambda name: self._rank(name, lowered))
+        matches = sorted(matches, key=lambda name: self._rank(name, lowered))
+        # typos: rank by the number of trigrams in common
+        counts = Counter()
+        for ids in lists:
+            counts.update(self._unpack(ids))
+        found = set(matches)
+        minimum = max(1, len(trigrams) // 2)
+        similar = (
+            (-count, len(self.names[branch_id]), self.names[branch_id])
+            for branch_id, count in counts.items()
+            if count >= minimum and self.names[branch_id] is not None and self.names[branch_id] not in found
+        )
+        return matches + [name for _, _, name in heapq.nsmallest(limit - len(matches), similar)]
+
+    def resolve(self, query: str, limit: int = 10, typos: bool = True) -> str:
+        """
+        Returns the branch the query refers to.
+
+        It is the only match, or the only branch equal to the query ignoring case, or the only one
+        containing it. Raises GithAmbiguousMatch with the best matches otherwise, or ValueError if
+        nothing matches.
+
+        Args:
+            query (str): Text to look for
+            limit (int, optional): Maximum number of matches given when it is ambiguous. Defaults to 10.
+            typos (bool, optional): Accept the only match even if it does not contain the query. Use False
+                where a wrong guess is harmful, e.g: to delete branches. Defaults to True.
+        """
+        matches = self.search(query, limit)
+        if not matches:
+            raise ValueError(f"No branch matches '{query}'.")
+        lowered = query.lower()
+        equal = [name for name in matches if name.lower() == lowered]
+        containing = [name for name in matches if lowered in name.lower()]
+        for candidates in ((matches, equal, containing) if typos else (equal, containing)):
+            if len(candidates) == 1:
+                return candidates[0]
+        if not containing:
+            raise GithAmbiguousMatch(query, matches, f"No branch contains '{query}', only similar ones.")
+        raise GithAmbiguousMatch(query, matches)
+
+    @staticmethod
+    def _count(ids) -> int:
+        """Returns the number of ids of a posting list, packed or not."""
+        return len(ids) // array("I").itemsize if isinstance(ids, bytes) else len(ids)
+
+    @staticmethod
+    def _unpack(ids) -> array:
+        """Returns a posting list as an array, unpacking it if needed, without keeping the unpacked copy."""
+        if isinstance(ids, bytes):
+            unpacked = array("I")
+            unpacked.frombytes(ids)
+            return unpacked
+        return ids
+
+    @staticmethod
+    def _rank(name: str, query: str) -> tuple:
+        """
+        Returns the sort key of a branch containing the (lowercased) query, lower is better.
+
+        Args:
+            name (str): Branch name
+            query (str): Lowercased query
+        """
+        lowered = name.lower()
+        position = lowered.find(query)
+        if lowered == query:
+            tier = 0
+        elif position == 0:
+            tier = 1
+        elif lowered[position - 1] in "/-_.":
+            tier = 2
+        else:
+            tier = 3
+        return tier, len(name), name
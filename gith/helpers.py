@@ -1,65 +1,477 @@
+import fnmatch
+import itertools
 import os
+import re
 import subprocess
+import sys
+import time
+from collections import deque
 
-from .console import GithConsole
-from .messages import GithMessage, GithMessageLevel
+import typer
 
-console = GithConsole()
+from .cache import GithBranchCache
+from .fuzzy import GithAmbiguousMatch, GithTrigramIndex
+from .console import console
+from .messages import GithExitCode, GithMessage, GithMessageLevel
+from .profile import profiler
+from .refs import GithRefs, GithRefsError
+from .selectors import GithSelector
+
+
+class GithRepoError(Exception):
+    """Raised when a repository can not be set up."""
 
 
 class GithHelper:
+    # longer lists are printed line by line instead of in a table
+    TABLE_LIMIT = 1000
+    # remote branches deleted by a single git push
+    PUSH_CHUNK = 100
+    DETAIL_COLUMNS = ["Last Commit", "Upstream", "Ahead/Behind", "Merged"]
+
+    def __init__(self):
+        # order of the branches after the current one: "name" or "recent" (last checkout first)
+        self.order = "name"
+
+    def run_git(self, args: list[str], input: str = None, cwd: str = None) -> subprocess.CompletedProcess:
+        """
+        Run a git command, capturing its output as text.
+
+        Every git invocation goes through here, so it can be traced with `gith --profile`.
+
+        Args:
+            args (list[str]): Arguments for git, e.g: ["checkout", "main"]
+            input (str, optional): Text sent to the standard input of git. Defaults to None.
+            cwd (str, optional): Directory to run git in. Defaults to the current directory.
+        """
+        argv = ["git", *args]
+        start = time.perf_counter()
+        result = subprocess.run(argv, input=input, cwd=cwd, capture_output=True, text=True)
+        profiler.record(
+            argv, start, time.perf_counter(), result.returncode, len(result.stdout or ""), len(result.stderr or "")
+        )
+        return result
+
+    def run_network_git(self, args: list[str], cwd: str = None) -> subprocess.CompletedProcess:
+        """
+        Run a git command that talks to a remote, like fetch, pull or push, see run_git.
+
+        What was printed so far is shown first, so the user does not wait on the network in front of
+        a blank screen.
+
+        Args:
+            args (list[str]): Arguments for git, e.g: ["fetch", "origin", "main"]
+            cwd (str, optional): Directory to run git in. Defaults to the current directory.
+        """
+        console.flush()
+        return self.run_git(args, cwd=cwd)
+
+    def run_git_progress(self, args: list[str], cwd: str = None) -> subprocess.CompletedProcess:
+        """
+        Run a long git command, like clone, showing its progress while it runs. Only standard error is captured.
+
+        The progress git writes is passed through to the terminal, or written as "progress" records in JSON
+        output mode, one for every new percentage of every phase, e.g: {"phase": "Receiving objects", "percent": 45}.
+        Use it with `--progress`, so git reports progress even if standard error is not a terminal.
+
+        Args:
+            args (list[str]): Arguments for git, e.g: ["clone", "--progress", url]
+            cwd (str, optional): Directory to run git in. Defaults to the current directory.
+        """
+        argv = ["git", *args]
+        # git writes its progress right away, after what was printed so far
+        console.flush()
+        start = time.perf_counter()
+        process = subprocess.Popen(argv, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        # the error is at the end, progress can be long
+        tail = deque(maxlen=50)
+        stderr_size = 0
+        last = None
+        # progress lines end with \r, read as line ends too
+        for line in process.stderr:
+            stderr_size += len(line)
+            # remote lines are padded with spaces to clear the previous one
+            line = line.rstrip()
+            tail.append(line)
+            match = re.match(r"(?:remote: )?([A-Za-z][\w ]*):\s+(\d+)%", line)
+            if console.json:
+                if match and match.groups() != last:
+                    last = match.groups()
+                    console.emit("progress", phase=match.group(1), percent=int(match.group(2)))
+            else:
+                sys.stderr.write(line + ("\r" if match and not line.endswith("done.") else "\n"))
+                sys.stderr.flush()
+        process.stderr.close()
+        process.wait()
+        profiler.record(argv, start, time.perf_counter(), process.returncode, 0, stderr_size)
+        stderr = "\n".join(line for line in tail if not re.match(r"(?:remote: )?[A-Za-z][\w ]*:\s+\d+%", line))
+        return subprocess.CompletedProcess(argv, process.returncode, "", stderr)
+
     def validate_git_repo(self) -> None:
         """
-        Validate if Git is installed.
+        Validate if the current directory is inside a Git repository.
+
+        The repository is located without spawning git; `git status` is only run to report the error.
         """
-        result = subprocess.run(["git", "status"], capture_output=True, text=True)
+        try:
+            GithRefs.find_git_dir(os.getcwd())
+            return
+        except (GithRefsError, OSError):
+            pass
+        # let git explain what is wrong
+        result = self.run_git(["status"])
         if not result.returncode == 0:
             GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
 
-    def git_branch(self, verbose: bool = True) -> list[str]:
+    def git_branch(self, verbose: bool = True, cwd: str = None, limit: int = None) -> list[str]:
         """
         Returns a list of local Git branches.
 
-        First branch in the list is the current branch, the rest are sorted alphabetically.
+        First branch in the list is the current branch, the rest are sorted alphabetically, or by
+        their last checkout if `order` is "recent" (see GithRefs.order_by_recent).
+        Refs are read directly from the repository files, through a snapshot cached in the
+        Git directory, so every index based command sees the same list until the refs change.
+        If that is not possible, for example with the reftable backend, `git branch` is used instead.
 
         Args:
             verbose (bool, optional): Print the branches in a table. Defaults to True.
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+            limit (int, optional): Only the first limit branches will be used, so only those need to be
+                ordered by recency. Defaults to None (all of them).
+        """
+        try:
+            refs = GithRefs(cwd)
+            branches = GithBranchCache(refs).branches()
+            if self.order == "recent":
+                branches = refs.order_by_recent(branches, limit)
+        except (GithRefsError, OSError):
+            branches = self.git_branch_subprocess(cwd)
+        if verbose:
+            self.print_branches(branches)
+        return branches
+
+    def git_branch_subprocess(self, cwd: str = None) -> list[str]:
+        """
+        Returns a list of local Git branches, parsing the output of `git branch`.
+
+        First branch in the list is the current branch, the rest are sorted alphabetically.
+
+        Args:
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
         """
         current = []
         others = []
-        result = subprocess.run(["git", "branch"], capture_output=True, text=True)
+        result = self.run_git(["branch"], cwd=cwd)
         for branch in result.stdout.split("\n"):
             if branch.strip():
                 name = branch.strip()
                 if name.startswith("*"):
                     current.append(name.replace('*', '').strip())
                 else:
-                    others.append(name)
-        branches = current + sorted(others)
+                    others.append(name.lstrip("+").strip())
+        return current + sorted(others)
+
+    def git_remote_branch(self, cwd: str = None) -> list[str]:
+        """
+        Returns the remote-tracking branches, e.g: origin/main, sorted alphabetically.
+
+        They are read from the repository files as of the last fetch, without any network access.
+        If that is not possible, `git for-each-ref` is used instead.
+
+        Args:
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+        """
+        try:
+            return GithRefs(cwd).remote_branches()
+        except (GithRefsError, OSError):
+            result = self.run_git(["for-each-ref", "--format=%(refname:lstrip=2)%00%(symref)", "refs/remotes"], cwd=cwd)
+            return sorted(
+                name for name, _, symref in (line.partition("\0") for line in result.stdout.splitlines()) if not symref
+            )
+
+    def fetch_remotes(self, verbose: bool = True) -> None:
+        """
+        Update the remote-tracking branches of every remote with a single `git fetch --all --prune`.
+
+        Args:
+            verbose (bool, optional): Print a message once fetched. Defaults to True.
+        """
+        result = self.run_network_git(["fetch", "--all", "--prune"])
+        if result.returncode != 0:
+            GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
         if verbose:
-            self.print_branches(branches)
-        return branches
-    
-    def print_branches(self, branches: list) -> None:
+            self.report("Fetched [green]all remotes[/green]", "fetched")
+
+    def track_branch(self, remote_branch: str, verbose: bool = True) -> tuple[str, str]:
+        """
+        Create a local branch tracking a remote-tracking branch, unless it already exists.
+
+        Returns the name of the local branch and of its remote, e.g: (feature/login, origin) for origin/feature/login.
+
+        Args:
+            remote_branch (str): Name of the remote-tracking branch, e.g: origin/feature/login
+            verbose (bool, optional): Print a message if the branch is created. Defaults to True.
+        """
+        remote, _, branch_name = remote_branch.partition("/")
+        if branch_name in self.get_branch_oids():
+            return branch_name, remote
+        result = self.run_git(["branch", "--track", branch_name, f"refs/remotes/{remote_branch}"])
+        if result.returncode != 0:
+            GithMessage(f"Error creating branch: {result.stderr}", GithMessageLevel.ERROR)
+        if verbose:
+            self.report(
+                f"Branch [green]{branch_name}[/green] created, tracking [green]{remote_branch}[/green].",
+                "created",
+                branch=branch_name,
+                upstream=remote_branch,
+            )
+        return branch_name, remote
+
+    def print_branches(self, branches: list, details: dict = None) -> None:
         """
         Print the branches in a formatted table.
 
         Args:
             branches (list[str]): List of branch names
+            details (dict, optional): Branch details, as returned by get_branch_details, to show as
+                extra columns. Defaults to None
         """
+        self.print_branch_rows(list(enumerate(branches, start=1)), details)
+
+    def print_branch_rows(self, rows: list[tuple[int, str]], details: dict = None, current: bool = True) -> None:
+        """
+        Print the given branches, with their indexes, in a formatted table.
+
+        Args:
+            rows (list[tuple[int, str]]): Index and name of the branches
+            details (dict, optional): Branch details, as returned by get_branch_details, to show as
+                extra columns. Defaults to None
+            current (bool, optional): Whether the branch of index 1 is the current one. Defaults to True.
+        """
+        if console.json:
+            self.emit_branch_rows(rows, details, current)
+            return
         columns = [
             {"name": "Index", "justify": "right"},
             {"name": "Branch Name", "justify": "left"},
         ]
+        if details is not None:
+            columns += [{"name": name, "justify": "left"} for name in self.DETAIL_COLUMNS]
         rows = [
             {
-                "data": [str(index), branch],
-                "style": f"{'green' if index == 1 else 'default'}"
+                "data": [str(index), branch] + (self._format_details(details, branch) if details is not None else []),
+                "style": f"{'green' if current and index == 1 else 'default'}"
             }
-            for index, branch in enumerate(branches, start=1)
+            for index, branch in rows
         ]
         console.print_table(columns, rows)
 
+    def list_branches(
+        self,
+        pattern: str = None,
+        limit: int = None,
+        sort: str = None,
+        details: bool = False,
+        merged: bool = False,
+        gone: bool = False,
+        base: str = None,
+        remote: bool = False,
+    ) -> None:
+        """
+        Print the branches, optionally filtered, limited and sorted, as they are found.
+
+        Indexes are always the ones of the full list returned by git_branch, so they can be used with
+        any other command. Without options, small lists are shown in a table as usual; otherwise rows
+        are printed line by line, through a pager when writing to a terminal.
+
+        Args:
+            pattern (str, optional): Only show branches matching this glob, e.g: feature/*. Defaults to None
+            limit (int, optional): Show at most this number of branches. Defaults to None
+            sort (str, optional): git for-each-ref sort key, e.g: -committerdate. Defaults to None (index order)
+            details (bool, optional): Show last commit date, upstream, ahead/behind and merged status. Defaults to False
+            merged (bool, optional): Only show branches merged into base. Defaults to False
+            gone (bool, optional): Only show branches whose upstream is gone. Defaults to False
+            base (str, optional): Branch used for the merged status. Defaults to None (current branch)
+            remote (bool, optional): List the remote-tracking branches instead, see git_remote_branch. Their
+                indexes are used by `gith checkout --remote`. Defaults to False
+        """
+        # the indexes shown only depend on the first branches when nothing else is filtered out
+        first = limit if pattern is None and sort is None and not merged and not gone else None
+        branches = self.git_remote_branch() if remote else self.git_branch(verbose=False, limit=first)
+        info = self.get_branch_details(base, with_merged=details or merged) if details or merged or gone else None
+        if sort is None:
+            rows = enumerate(branches, start=1)
+        else:
+            indexes = {name: index for index, name in enumerate(branches, start=1)}
+            # with a pattern or selectors, git can not know how many rows will be shown
+            count = None if pattern is not None or merged or gone else limit
+            rows = (
+                (indexes[name], name)
+                for name in self.stream_git_lines(self.for_each_ref_args(count, sort, remote))
+                if name in indexes
+            )
+        if pattern is not None:
+            # the same glob matching with or without sort, git would match path components instead
+            rows = ((index, name) for index, name in rows if fnmatch.fnmatchcase(name, pattern))
+        if merged or gone:
+            rows = ((index, name) for index, name in rows if self._is_selected(info.get(name), merged, gone))
+        if limit is not None:
+            rows = itertools.islice(rows, limit)
+        details = info if details else None
+        if console.json:
+            self.emit_branch_rows(rows, details, not remote)
+            return
+        if pattern is None and limit is None and sort is None and len(branches) <= self.TABLE_LIMIT:
+            self.print_branch_rows(list(rows), details, not remote)
+            return
+        from rich.markup import escape
+
+        width = len(str(len(branches)))
+        header = "" if details is None else "  " + "  ".join(self.DETAIL_COLUMNS)
+        with console.pager():
+            console.print_message(f"[bold]{'#':>{width}}  Branch Name{header}[/bold]")
+            for index, name in rows:
+                style = "green" if index == 1 and not remote else "default"
+                extra = "" if details is None else "  " + "  ".join(self._format_details(details, name))
+                console.print_message(f"[{style}]{index:>{width}}  {escape(name)}{escape(extra)}[/{style}]")
+
+    def emit_branch_rows(self, rows, details: dict = None, current: bool = True) -> None:
+        """
+        Write a "branch" record for every branch, as soon as it is found, in JSON output mode.
+
+        Args:
+            rows (Iterable[tuple[int, str]]): Index and name of the branches
+            details (dict, optional): Branch details, as returned by get_branch_details. Defaults to None
+            current (bool, optional): Whether the branch of index 1 is the current one. Defaults to True.
+        """
+        for index, name in rows:
+            record = {"index": index, "name": name, "current": current and index == 1}
+            if details is not None:
+                record.update(details.get(name, {}))
+            console.emit("branch", **record)
+
+    def report(self, message: str, record_type: str, **fields) -> None:
+        """
+        Show a LOG message, or write a record instead of it in JSON output mode.
+
+        Args:
+            message (str): Message to show
+            record_type (str): Type of the record, e.g: checkout
+            **fields: Fields of the record
+        """
+        if console.json:
+            console.emit(record_type, **fields)
+        else:
+            GithMessage(message, GithMessageLevel.LOG)
+
+    def get_branch_details(self, base: str = None, with_merged: bool = True) -> dict[str, dict]:
+        """
+        Returns the last commit date, upstream, ahead/behind counts and merged status of every local branch.
+
+        Everything is read with one `git for-each-ref`, plus one `git for-each-ref --merged` if with_merged
+        is True, no matter how many branches there are.
+
+        Args:
+            base (str, optional): Branch used for the merged status. Defaults to None (current branch)
+            with_merged (bool, optional): Compute the merged status. Defaults to True
+        """
+        result = self.run_git([
+            "for-each-ref",
+            "--format=%(refname:lstrip=2)%00%(committerdate:relative)%00%(upstream:short)"
+            "%00%(upstream:track,nobracket)",
+            "refs/heads",
+        ])
+        if result.returncode != 0:
+            GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+        details = {}
+        for line in result.stdout.splitlines():
+            name, date, upstream, track = line.split("\0")
+            details[name] = {"date": date, "upstream": upstream, "track": track, "merged": None}
+        if with_merged:
+            result = self.run_git(["for-each-ref", f"--merged={base or 'HEAD'}", "--format=%(refname:lstrip=2)", "refs/heads"])
+            if result.returncode != 0:
+                GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+            merged = set(result.stdout.splitlines())
+            for name, branch_details in details.items():
+                branch_details["merged"] = name in merged
+        return details
+
+    def _format_details(self, details: dict, branch_name: str) -> list[str]:
+        """
+        Returns the values of DETAIL_COLUMNS for a branch.
+
+        Args:
+            details (dict): Branch details, as returned by get_branch_details
+            branch_name (str): Name of the branch
+        """
+        branch_details = details.get(branch_name)
+        if branch_details is None:
+            return ["", "", "", ""]
+        merged = {True: "yes", False: "no", None: ""}[branch_details["merged"]]
+        return [branch_details["date"], branch_details["upstream"], branch_details["track"], merged]
+
+    @staticmethod
+    def _is_selected(branch_details: dict, merged: bool, gone: bool) -> bool:
+        """
+        Whether a branch matches the --merged and --gone selectors.
+
+        Args:
+            branch_details (dict): Details of the branch, as returned by get_branch_details
+            merged (bool): The branch must be merged
+            gone (bool): The upstream of the branch must be gone
+        """
+        if branch_details is None:
+            return False
+        if merged and not branch_details["merged"]:
+            return False
+        if gone and branch_details["track"] != "gone":
+            return False
+        return True
+
+    def for_each_ref_args(self, limit: int = None, sort: str = None, remote: bool = False) -> list[str]:
+        """
+        Returns the arguments of `git for-each-ref` listing local branch names.
+
+        Args:
+            limit (int, optional): Maximum number of branches. Defaults to None
+            sort (str, optional): Sort key. Defaults to None (refname)
+            remote (bool, optional): List remote-tracking branch names instead, e.g: origin/main. Defaults to False
+        """
+        prefix = "refs/remotes" if remote else "refs/heads"
+        args = ["for-each-ref", "--format=%(refname:lstrip=2)"]
+        if sort is not None:
+            args.append(f"--sort={sort}")
+        if limit is not None:
+            args.append(f"--count={limit}")
+        args.append(prefix)
+        return args
+
+    def stream_git_lines(self, args: list[str]):
+        """
+        Run a git command and yield its output line by line, while it is still running.
+
+        Args:
+            args (list[str]): Arguments for git, e.g: ["for-each-ref", "refs/heads"]
+        """
+        argv = ["git", *args]
+        start = time.perf_counter()
+        process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        output_size = 0
+        try:
+            for line in process.stdout:
+                output_size += len(line)
+                yield line.rstrip("\n")
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.terminate()
+            stderr = process.stderr.read()
+            process.stderr.close()
+            process.wait()
+            profiler.record(argv, start, time.perf_counter(), process.returncode, output_size, len(stderr))
+        if process.returncode not in (0, -15):
+            GithMessage(f"{stderr}", GithMessageLevel.ERROR)
+
     def create_branch(
         self,
         branch_name: str,
@@ -70,11 +482,12 @@ class GithHelper:
         """
         Create a new branch in the Git repository.
 
-        1. checkout to the branch if from_branch != 1, else stay in current branch
-        2. pull the latest changes. It might happens that this branch does not exist on the remote, try catch the error,
-        ignore it, and just show an info message. This is not an error that will block the branch creation.
-        3. create a new branch from the current branch
-        4. checkout to the new branch if checkout is True
+        1. fetch the branch of index from_branch from origin, without touching the working tree.
+        It might happens that this branch does not exist on the remote, in that case just show an info message.
+        This is not an error that will block the branch creation.
+        2. fast-forward that branch to the fetched commit. Its ref is updated directly, unless it is the
+        current branch, which is fast-forwarded with `git merge --ff-only`
+        3. create the new branch from it, switching the working tree to it only once if checkout is True
 
         Args:
             branch_name (str): The name of the new branch.
@@ -82,31 +495,166 @@ class GithHelper:
             checkout (bool, optional): Checkout to the new branch after creating it. Defaults to False.
             name_separator (str, optional): The separator to use when creating a branch name with spaces. Defaults to "_".
         """
-        branches = gith.git_branch(verbose=False)
-        current_branch = branches[0]
-        if from_branch != 1:
-            self.checkout_to_branch(branches[from_branch - 1], verbose=False)
-            current_branch = branches[from_branch - 1]
-
-        try:
-            self.git_pull(current_branch)
-        except Exception:
+        branches = self.git_branch(verbose=False)
+        if not 1 <= from_branch <= len(branches):
+            GithMessage(f"There is no branch with index {from_branch}.", GithMessageLevel.ERROR)
+        source_branch = branches[from_branch - 1]
+        oid, error = self.fetch_branch(source_branch)
+        if oid is None:
             GithMessage(
-                f"Error while pulling from [green]{current_branch}[/green]. This will not block the branch creation.",
+                f"Error while pulling from [green]{source_branch}[/green]. This will not block the branch creation.\n"
+                f"{error}",
                 GithMessageLevel.INFO
             )
-        result = subprocess.run(
-            ["git", "branch", branch_name], capture_output=True, text=True
-        )
+        elif not self.fast_forward_branch(source_branch, oid):
+            GithMessage(
+                f"Unable to fast-forward [green]{source_branch}[/green] to origin. "
+                "The new branch is created from the local branch.",
+                GithMessageLevel.INFO
+            )
+        args = ["checkout", "-b", branch_name, source_branch] if checkout else ["branch", branch_name, source_branch]
+        result = self.run_git(args)
         if result.returncode == 0:
             message = (
                 f"New branch [green]{branch_name}[/green] created "
-                f"from [green]{current_branch}[/green]."
+                f"from [green]{source_branch}[/green]."
             )
-            GithMessage(message, GithMessageLevel.LOG)
+            self.report(message, "created", branch=branch_name, source=source_branch)
+            if checkout:
+                self.report(f"Switched to branch [green]{branch_name}[/green].", "checkout", branch=branch_name)
         else:
             GithMessage(f"Error creating branch: {result.stderr}", GithMessageLevel.ERROR)
 
+    def switch_branch(self, branch_name: str, pull: bool = True, remote: str = "origin") -> None:
+        """
+        Checkout to the specified branch, with the latest changes from remote if pull is True.
+
+        The branch is fetched and fast-forwarded before the checkout, so the working tree is switched only once.
+        If the branch can not be fast-forwarded, it is pulled after the checkout as usual.
+
+        Args:
+            branch_name (str): The name of the branch to checkout to.
+            pull (bool, optional): Get the latest changes from remote. Defaults to True.
+            remote (str, optional): Remote to pull from. Defaults to "origin".
+        """
+        if not pull:
+            self.checkout_to_branch(branch_name)
+            return
+        oid, error = self.fetch_branch(branch_name, remote)
+        fast_forwarded = oid is not None and self.fast_forward_branch(branch_name, oid)
+        self.checkout_to_branch(branch_name)
+        if fast_forwarded:
+            self.report(f"Pulling changes from [green]{branch_name}[/green]", "pulled", branch=branch_name)
+        elif oid is None:
+            GithMessage(f"{error}", GithMessageLevel.ERROR)
+        else:
+            self.git_pull(branch_name, remote=remote)
+
+    def switch_worktree(
+        self, branch_name: str, pool, pull: bool = True, path_only: bool = False, remote: str = "origin"
+    ) -> None:
+        """
+        Show the path of a worktree of the pool with the branch checked out, instead of switching the current one.
+
+        The branch is fetched and fast-forwarded before it is checked out, as in switch_branch. As the worktree
+        is ready anyway, a failed fetch is only reported.
+
+        Args:
+            branch_name (str): The name of the branch to checkout to.
+            pool (GithWorktreePool): The worktree pool of the repository.
+            pull (bool, optional): Get the latest changes from remote. Defaults to True.
+            path_only (bool, optional): Only print the path, e.g: for `cd "$(gith checkout --path-only 3)"`.
+                Defaults to False.
+            remote (str, optional): Remote to pull from. Defaults to "origin".
+        """
+        from .worktrees import GithWorktreeError
+
+        oid, error = self.fetch_branch(branch_name, remote) if pull else (None, "")
+        fast_forwarded = oid is not None and self.fast_forward_branch(branch_name, oid)
+        try:
+            path, exceeded = pool.switch(branch_name)
+        except GithWorktreeError as e:
+            GithMessage(f"{e}", GithMessageLevel.ERROR)
+        if fast_forwarded and not path_only:
+            self.report(f"Pulling changes from [green]{branch_name}[/green]", "pulled", branch=branch_name)
+        elif oid is not None and not fast_forwarded:
+            self.git_pull(branch_name, cwd=path, verbose=not path_only, remote=remote)
+        if path_only and not console.json:
+            typer.echo(path)
+            return
+        if pull and oid is None:
+            GithMessage(f"Unable to pull [green]{branch_name}[/green]: {error.strip()}", GithMessageLevel.INFO)
+        if exceeded:
+            GithMessage(
+                f"Every worktree of the pool has local changes, so it has more than {pool.size} worktrees. "
+                "Use [green]gith worktree prune[/green] to remove the least recently used ones.",
+                GithMessageLevel.INFO,
+            )
+        self.report(
+            f"Branch [green]{branch_name}[/green] is checked out at [green]{path}[/green]",
+            "worktree",
+            branch=branch_name,
+            path=path,
+        )
+
+    def fetch_branch(self, branch_name: str, remote: str = "origin") -> tuple:
+        """
+        Fetch a branch from remote, without touching the working tree.
+
+        Returns the fetched object id and an empty string, or None and the error of git.
+
+        Args:
+            branch_name (str): The name of the branch to fetch.
+            remote (str, optional): Remote to fetch from. Defaults to "origin".
+        """
+        result = self.run_network_git(["fetch", remote, branch_name])
+        if result.returncode != 0:
+            return None, result.stderr
+        try:
+            return GithRefs().read_fetch_head(), ""
+        except (GithRefsError, OSError):
+            result = self.run_git(["rev-parse", "FETCH_HEAD"])
+            return (result.stdout.strip(), "") if result.returncode == 0 else (None, result.stderr)
+
+    def fast_forward_branch(self, branch_name: str, oid: str) -> bool:
+        """
+        Fast-forward a local branch to the given commit. Returns whether the branch is now at that commit.
+
+        The ref is updated directly, without touching any working tree, unless the branch is checked
+        out in the current worktree, which is fast-forwarded with `git merge --ff-only`.
+        Branches checked out in other worktrees, or that diverged, are not updated.
+
+        Args:
+            branch_name (str): The name of the branch to fast-forward.
+            oid (str): The commit to fast-forward to.
+        """
+        local_oid = self.get_branch_oids().get(branch_name)
+        if local_oid is None:
+            return False
+        if local_oid == oid:
+            return True
+        if self.run_git(["merge-base", "--is-ancestor", local_oid, oid]).returncode != 0:
+            return False
+        if branch_name == self.get_current_branch():
+            return self.run_git(["merge", "--ff-only", oid]).returncode == 0
+        if branch_name in self.get_checked_out_branches():
+            return False
+        updated, _ = self.apply_ref_updates(
+            {branch_name: f"update refs/heads/{branch_name} {oid} {local_oid}"}, message="gith: fast-forward"
+        )
+        return bool(updated)
+
+    def get_current_branch(self) -> str:
+        """
+        Returns the name of the current branch, or None if HEAD is detached.
+        """
+        try:
+            return GithRefs().current_branch()
+        except (GithRefsError, OSError):
+            pass
+        result = self.run_git(["symbolic-ref", "--short", "-q", "HEAD"])
+        return result.stdout.strip() or None
+
     def checkout_to_branch(self, branch_name: str, verbose: bool = True) -> None:
         """
         Checkout to the specified branch.
@@ -115,211 +663,895 @@ class GithHelper:
             branch_name (str): The name of the branch to checkout to.
             verbose (bool, optional): Print a message if the branch is switched. Defaults to True.
         """
-        result = subprocess.run(
-            ["git", "checkout", branch_name], capture_output=True, text=True
-        )
+        result = self.run_git(["checkout", branch_name])
         if result.returncode == 0 and verbose:
-            GithMessage(f"Switched to branch [green]{branch_name}[/green].", GithMessageLevel.LOG)
+            self.report(f"Switched to branch [green]{branch_name}[/green].", "checkout", branch=branch_name)
         elif result.returncode != 0:
             GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
 
-    def delete_branches(self, delete: str) -> None:
+    def delete_branches(
+        self,
+        delete: str,
+        atomic: bool = False,
+        merged: bool = False,
+        gone: bool = False,
+        base: str = None,
+        remote: bool = False,
+        local: bool = False,
+        dry_run: bool = False,
+    ) -> None:
         """
         Delete branches by their indexes.
 
         Args:
-            delete (str): Comma-separated list of branch indexes
-        """
-        branches = gith.git_branch(verbose=False)
-        indexes = self.get_indexes_from_str(delete)
-        for index, branch_name in enumerate(branches, start=1):
-            try:
-                if index in indexes:
-                    result = subprocess.run(
-                        ["git", "branch", "-D", branch_name],
-                        capture_output=True,
-                        text=True,
-                    )
-                    if result.returncode == 0:
-                        GithMessage(f"Deleting [green]{branch_name}[/green]", GithMessageLevel.LOG)
-                    else:
-                        GithMessage(f"{result.stderr}", GithMessageLevel.ERROR, abort=False)
-            except Exception as e:
-                GithMessage(f"{e}", GithMessageLevel.ERROR, abort=False)
-        GithMessage("Process [green]Done.[/green]", GithMessageLevel.LOG)
-        # show the updated branches again
-        gith.git_branch()
-    
-    def keep_branches(self, keep: str):
+            delete (str): Selector of the branches to delete, e.g: 3-10,feature/*,!5. See GithSelector
+            atomic (bool, optional): Delete nothing if any of the branches can not be deleted. Defaults to False.
+            merged (bool, optional): Only delete the selected branches merged into base. Defaults to False.
+            gone (bool, optional): Only delete the selected branches whose upstream is gone. Defaults to False.
+            base (str, optional): Branch used for the merged status. Defaults to None (current branch).
+            remote (bool, optional): Delete remote branches, selected by the indexes of git_remote_branch.
+                Defaults to False.
+            local (bool, optional): With remote, also delete the local branches of the same name. Defaults to False.
+            dry_run (bool, optional): Only show what would be deleted. Defaults to False.
+        """
+        if remote:
+            branches = self.git_remote_branch()
+            targets = [branch_name for _, branch_name in self.select_from_str(delete, branches, remote=True)]
+            targets = self.select_remote_branches(targets, merged, base)
+            self.remove_remote_branches(branches, targets, atomic, local, dry_run)
+            return
+        branches = self.git_branch(verbose=False)
+        targets = [branch_name for _, branch_name in self.select_from_str(delete, branches)]
+        targets = self.select_branches(targets, merged, gone, base)
+        self.remove_branches(branches, targets, atomic, dry_run)
+
+    def keep_branches(
+        self,
+        keep: str,
+        atomic: bool = False,
+        merged: bool = False,
+        gone: bool = False,
+        base: str = None,
+        remote: bool = False,
+        local: bool = False,
+        dry_run: bool = False,
+    ) -> None:
         """
         Keep the branches specified by indexes. Delete the rest.
 
         Args:
-            keep (str): Comma-separated list of branch indexes to keep
-        """
-        branches = gith.git_branch(verbose=False)
-        indexes = self.get_indexes_from_str(keep)
-        for index, branch_name in enumerate(branches, start=1):
-            try:
-                if index not in indexes:
-                    result = subprocess.run(
-                        ["git", "branch", "-D", branch_name], capture_output=True, text=True
-                    )
-                    if result.returncode == 0:
-                        GithMessage(f"Deleting [green]{branch_name}[/green]", GithMessageLevel.LOG)
-                    else:
-                        console.print(
-                            f"Error: Unable to delete branch [red]{branch_name}[/red]."
-                        )
-            except Exception as e:
-                GithMessage(f"{e}", GithMessageLevel.ERROR, abort=False)
-        GithMessage("Process [green]Done.[/green]", GithMessageLevel.LOG)
-        # show the updated branches again
-        gith.git_branch()
-    
-    def get_indexes_from_str(self, indexes: str) -> list[int]:
+            keep (str): Selector of the branches to keep, e.g: 1,release/*. See GithSelector
+            atomic (bool, optional): Delete nothing if any of the branches can not be deleted. Defaults to False.
+            merged (bool, optional): Only delete the other branches merged into base. Defaults to False.
+            gone (bool, optional): Only delete the other branches whose upstream is gone. Defaults to False.
+            base (str, optional): Branch used for the merged status. Defaults to None (current branch).
+            remote (bool, optional): Keep remote branches, selected by the indexes of git_remote_branch, and delete
+                the rest, except the default branch of every remote. Defaults to False.
+            local (bool, optional): With remote, also delete the local branches of the same name. Defaults to False.
+            dry_run (bool, optional): Only show what would be deleted. Defaults to False.
+        """
+        if remote:
+            branches = self.git_remote_branch()
+            kept = {branch_name for _, branch_name in self.select_from_str(keep, branches, remote=True)}
+            kept.update(self.get_remote_heads(branches))
+            targets = [branch_name for branch_name in branches if branch_name not in kept]
+            targets = self.select_remote_branches(targets, merged, base)
+            self.remove_remote_branches(branches, targets, atomic, local, dry_run)
+            return
+        branches = self.git_branch(verbose=False)
+        kept = {branch_name for _, branch_name in self.select_from_str(keep, branches)}
+        targets = [branch_name for branch_name in branches if branch_name not in kept]
+        targets = self.select_branches(targets, merged, gone, base)
+        self.remove_branches(branches, targets, atomic, dry_run)
+
+    def select_branches(
+        self, branches: list[str], merged: bool = False, gone: bool = False, base: str = None
+    ) -> list[str]:
+        """
+        Returns the branches matching the --merged and --gone selectors. Without selectors, all of them.
+
+        Args:
+            branches (list[str]): Names of the branches
+            merged (bool, optional): Keep only branches merged into base. Defaults to False.
+            gone (bool, optional): Keep only branches whose upstream is gone. Defaults to False.
+            base (str, optional): Branch used for the merged status. Defaults to None (current branch).
+        """
+        if not merged and not gone:
+            return branches
+        details = self.get_branch_details(base, with_merged=merged)
+        return [branch_name for branch_name in branches if self._is_selected(details.get(branch_name), merged, gone)]
+
+    def select_remote_branches(self, branches: list[str], merged: bool = False, base: str = None) -> list[str]:
+        """
+        Returns the remote branches merged into base if merged is True, all of them otherwise.
+
+        Args:
+            branches (list[str]): Names of the remote-tracking branches, e.g: origin/feature/login
+            merged (bool, optional): Keep only branches merged into base. Defaults to False.
+            base (str, optional): Branch used for the merged status. Defaults to None (current branch).
         """
-        Process the string of indexes and return a list of integers.
+        if not merged:
+            return branches
+        result = self.run_git(
+            ["for-each-ref", f"--merged={base or 'HEAD'}", "--format=%(refname:lstrip=2)", "refs/remotes"]
+        )
+        if result.returncode != 0:
+            GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+        merged_branches = set(result.stdout.splitlines())
+        return [branch_name for branch_name in branches if branch_name in merged_branches]
+
+    def get_remote_heads(self, branches: list[str]) -> set[str]:
+        """
+        Returns the default branch of every remote of the given branches, e.g: origin/main.
+
+        It is read from refs/remotes/<remote>/HEAD, as set by `git clone` or `git remote set-head`. Remotes
+        without it, like the ones set up by `gith repo`, are asked with one `git ls-remote --symref` each,
+        and the program aborts if their default branch can not be found.
+
+        Args:
+            branches (list[str]): Names of the remote-tracking branches, e.g: origin/feature/login
+        """
+        result = self.run_git(["for-each-ref", "--format=%(symref:lstrip=2)", "refs/remotes"])
+        heads = {line for line in result.stdout.splitlines() if line}
+        known = {head.partition("/")[0] for head in heads}
+        for remote in dict.fromkeys(branch_name.partition("/")[0] for branch_name in branches):
+            if remote in known:
+                continue
+            result = self.run_network_git(["ls-remote", "--symref", remote, "HEAD"])
+            match = re.search(r"^ref: refs/heads/(\S+)\tHEAD$", result.stdout, re.MULTILINE)
+            if result.returncode != 0 or match is None:
+                GithMessage(
+                    f"Unable to find the default branch of {remote}, which --keep never deletes. Set it with "
+                    f"git remote set-head {remote} --auto.\n{result.stderr}".strip(),
+                    GithMessageLevel.ERROR,
+                )
+            heads.add(f"{remote}/{match.group(1)}")
+        return heads
+
+    def remove_branches(
+        self, branches: list[str], targets: list[str], atomic: bool = False, dry_run: bool = False
+    ) -> None:
+        """
+        Delete the target branches in a single ref transaction and show the remaining branches.
+
+        All targets are resolved first and removed with one `git update-ref --stdin` call.
+        Branches checked out in a worktree are skipped, as `git branch -D` does.
+        If a ref can not be locked, it is reported and the transaction is retried without it,
+        unless atomic is True, in which case nothing is deleted and the program aborts.
+
+        In JSON output mode, a "deleted" or "delete_failed" record is written for every target instead.
+        In both modes, the program exits with GithExitCode.PARTIAL if any branch could not be deleted.
+
+        Args:
+            branches (list[str]): Current list of local branches, as returned by git_branch
+            targets (list[str]): Names of the branches to delete
+            atomic (bool, optional): Delete nothing if any of the branches can not be deleted. Defaults to False.
+            dry_run (bool, optional): Only show what would be deleted. Defaults to False.
+        """
+        deleted, failed = self.delete_branch_refs(targets, atomic, dry_run=dry_run)
+        self.report_deletions(deleted, failed, dry_run)
+        if dry_run:
+            return
+        removed = set(deleted)
+        self.finish_deletions(failed, atomic, [branch_name for branch_name in branches if branch_name not in removed])
+
+    def remove_remote_branches(
+        self, branches: list[str], targets: list[str], atomic: bool = False, local: bool = False, dry_run: bool = False
+    ) -> None:
+        """
+        Delete the target branches on their remotes, see push_deletions, and show the remaining remote branches.
+
+        If local is True, the local branches with the same names as the deleted ones are deleted too, in a single
+        ref transaction, as remove_branches does. Records and exit codes are the same as remove_branches, with
+        the remote of every remote branch.
+
+        Args:
+            branches (list[str]): Current list of remote branches, as returned by git_remote_branch
+            targets (list[str]): Names of the remote-tracking branches to delete, e.g: origin/feature/login
+            atomic (bool, optional): Delete nothing on a remote if any of its branches can not be deleted.
+                Defaults to False.
+            local (bool, optional): Also delete the local branches of the same name. Defaults to False.
+            dry_run (bool, optional): Only show what would be deleted, without any network access. Defaults to False.
+        """
+        deleted, failed = (targets, {}) if dry_run else self.push_deletions(targets, atomic)
+        self.report_deletions(deleted, failed, dry_run, remote=True)
+        if local and deleted:
+            oids = self.get_branch_oids()
+            names = [branch_name.partition("/")[2] for branch_name in deleted]
+            local_deleted, local_failed = self.delete_branch_refs(
+                [branch_name for branch_name in dict.fromkeys(names) if branch_name in oids], dry_run=dry_run
+            )
+            self.report_deletions(local_deleted, local_failed, dry_run)
+            failed = {**failed, **local_failed}
+        if dry_run:
+            return
+        removed = set(deleted)
+        remaining = [branch_name for branch_name in branches if branch_name not in removed]
+        self.finish_deletions(failed, atomic, remaining, current=False)
+
+    def push_deletions(self, targets: list[str], atomic: bool = False) -> tuple[list[str], dict[str, str]]:
+        """
+        Delete remote branches with `git push --atomic <remote> --delete ...`, one push per chunk of branches.
+
+        Returns the deleted branches and a mapping of the ones that could not be deleted to the reason.
+
+        Every push deletes up to PUSH_CHUNK branches of one remote, all or none of them. If some of them are
+        rejected, they are reported and the push is retried without them, unless atomic is True. If all of them
+        are rejected, e.g: by a pre-receive hook that declines the whole push, the chunk is split in halves and
+        each half is pushed again. With atomic, all the branches of a remote are pushed at once, and the following
+        remotes are not pushed after a failure.
+
+        Args:
+            targets (list[str]): Names of the remote-tracking branches to delete, e.g: origin/feature/login
+            atomic (bool, optional): Delete nothing on a remote if any of its branches can not be deleted.
+                Defaults to False.
+        """
+        by_remote = {}
+        for branch_name in targets:
+            remote, _, name = branch_name.partition("/")
+            by_remote.setdefault(remote, []).append(name)
+        deleted, failed = [], {}
+        for remote, names in by_remote.items():
+            if atomic and failed:
+                failed.update({f"{remote}/{name}": "Not pushed, a previous remote failed." for name in names})
+                continue
+            chunk_size = len(names) if atomic else self.PUSH_CHUNK
+            chunks = deque(names[start:start + chunk_size] for start in range(0, len(names), chunk_size))
+            while chunks:
+                pending = chunks.popleft()
+                result = self.run_network_git(["push", "--atomic", "--porcelain", remote, "--delete", *pending])
+                if result.returncode == 0:
+                    deleted.extend(f"{remote}/{name}" for name in pending)
+                    continue
+                rejected = self._get_rejected_refs(result.stdout + result.stderr, remote, pending)
+                if not rejected or atomic:
+                    error = result.stderr.strip() or result.stdout.strip()
+                    for name in pending:
+                        failed[f"{remote}/{name}"] = rejected.get(name) or error
+                    continue
+                if len(rejected) == len(pending) > 1:
+                    # a pre-receive hook declines the whole push, bisect to find the branches it declines
+                    half = len(pending) // 2
+                    chunks.extendleft([pending[half:], pending[:half]])
+                    continue
+                failed.update({f"{remote}/{name}": reason for name, reason in rejected.items()})
+                remaining = [name for name in pending if name not in rejected]
+                if remaining:
+                    chunks.appendleft(remaining)
+        return deleted, failed
+
+    @staticmethod
+    def _get_rejected_refs(output: str, remote: str, names: list[str]) -> dict[str, str]:
+        """
+        Returns the branches a `git push --porcelain --delete` rejected for their own reason, with the reason.
+
+        Branches only rejected because another one failed the atomic push are not included.
+
+        Args:
+            output (str): Standard output and error of git push
+            remote (str): Name of the remote
+            names (list[str]): Names of the pushed branches, without the remote
+        """
+        pushed = set(names)
+        rejected = {}
+        for line in output.splitlines():
+            match = re.match(r"error: unable to delete '(.+)': (.+)", line)
+            if match:
+                name, reason = match.groups()
+            else:
+                # e.g: !<tab>:refs/heads/main<tab>[remote rejected] (protected branch hook declined)
+                fields = line.split("\t")
+                if len(fields) != 3 or fields[0] != "!" or "atomic push fail" in fields[2]:
+                    continue
+                name = fields[1].partition(":")[2]
+                if name.startswith("refs/heads/"):
+                    name = name[len("refs/heads/"):]
+                reason = re.sub(r"^\[[^\]]*\]\s*", "", fields[2]).strip("()")
+            if name in pushed:
+                rejected[name] = f"Unable to delete [red]{remote}/{name}[/red]: {reason}"
+        return rejected
+
+    def report_deletions(
+        self, deleted: list[str], failed: dict[str, str], dry_run: bool = False, remote: bool = False
+    ) -> None:
+        """
+        Show every deleted branch and the reasons of the failures, or write their records in JSON output mode.
+
+        Args:
+            deleted (list[str]): Names of the deleted branches
+            failed (dict[str, str]): Mapping of the branches that could not be deleted to the reason
+            dry_run (bool, optional): The branches would be deleted, but were not. Defaults to False.
+            remote (bool, optional): The branches are remote-tracking ones, e.g: origin/main. Defaults to False.
+        """
+        def fields(branch_name: str) -> dict:
+            return {"branch": branch_name, **({"remote": branch_name.partition("/")[0]} if remote else {})}
+
+        action, record_type = ("Would delete", "would_delete") if dry_run else ("Deleting", "deleted")
+        for branch_name in deleted:
+            self.report(f"{action} [green]{branch_name}[/green]", record_type, **fields(branch_name))
+        if console.json:
+            for branch_name, error in failed.items():
+                console.emit("delete_failed", error=console.plain(error), **fields(branch_name))
+            return
+        # the same git error may be the reason for many branches
+        for error in dict.fromkeys(failed.values()):
+            GithMessage(error, GithMessageLevel.ERROR, abort=False)
+
+    def finish_deletions(
+        self, failed: dict[str, str], atomic: bool, remaining: list[str], current: bool = True
+    ) -> None:
+        """
+        Abort if an atomic deletion failed, then show the remaining branches (not in JSON output mode),
+        and exit with GithExitCode.PARTIAL if any branch could not be deleted.
+
+        Args:
+            failed (dict[str, str]): Mapping of the branches that could not be deleted to the reason
+            atomic (bool): Whether nothing was deleted because of the failures
+            remaining (list[str]): Branches left, in index order
+            current (bool, optional): Whether the branch of index 1 is the current one. Defaults to True.
+        """
+        if atomic and failed:
+            GithMessage("No branches were deleted.", GithMessageLevel.ERROR)
+        if not console.json:
+            GithMessage("Process [green]Done.[/green]", GithMessageLevel.LOG)
+            # show the updated branches again, without asking git for them
+            self.print_branch_rows(list(enumerate(remaining, start=1)), current=current)
+        if failed:
+            raise typer.Exit(GithExitCode.PARTIAL)
+
+    def delete_branch_refs(
+        self, targets: list[str], atomic: bool = False, cwd: str = None, dry_run: bool = False
+    ) -> tuple[list[str], dict[str, str]]:
+        """
+        Delete the target branches in a single ref transaction, without printing anything.
+        Their [branch "<name>"] sections are then removed from the config, as `git branch -D` does.
+
+        Returns the deleted branches and a mapping of the branches that could not be deleted to the reason.
+
+        Args:
+            targets (list[str]): Names of the branches to delete
+            atomic (bool, optional): Delete nothing if any of the branches can not be deleted. Defaults to False.
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+            dry_run (bool, optional): Only check which branches can be deleted. Defaults to False.
+        """
+        oids = self.get_branch_oids(cwd)
+        checked_out = self.get_checked_out_branches(cwd)
+        pending = {}
+        failed = {}
+        for branch_name in targets:
+            if branch_name in checked_out:
+                failed[branch_name] = (
+                    f"Cannot delete branch [red]{branch_name}[/red] checked out at '{checked_out[branch_name]}'."
+                )
+            elif branch_name not in oids:
+                failed[branch_name] = f"Branch [red]{branch_name}[/red] not found."
+            else:
+                pending[branch_name] = f"delete refs/heads/{branch_name} {oids[branch_name]}"
+        if atomic and failed:
+            return [], failed
+        if dry_run:
+            return list(pending), failed
+        deleted, not_deleted = self.apply_ref_updates(pending, atomic, cwd)
+        failed.update(not_deleted)
+        self.remove_branch_config(deleted, cwd)
+        return deleted, failed
+
+    def remove_branch_config(self, branch_names: list[str], cwd: str = None) -> None:
+        """
+        Remove the [branch "<name>"] sections of the given branches from the repository config, as
+        `git branch -D` does, so a new branch with the same name does not inherit their upstream.
+
+        The sections are listed with one `git config --get-regexp`, and `git config --remove-section`
+        only runs for the branches that have one, usually the few with an upstream.
+
+        Args:
+            branch_names (list[str]): Names of the deleted branches
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+        """
+        if not branch_names:
+            return
+        result = self.run_git(["config", "--local", "--name-only", "--get-regexp", r"^branch\."], cwd=cwd)
+        # keys look like branch.<name>.remote, and names can contain dots
+        sections = {key[len("branch."):key.rfind(".")] for key in result.stdout.splitlines()}
+        for branch_name in branch_names:
+            if branch_name in sections:
+                self.run_git(["config", "--local", "--remove-section", f"branch.{branch_name}"], cwd=cwd)
+
+    def apply_ref_updates(
+        self, commands: dict[str, str], atomic: bool = False, cwd: str = None, message: str = None
+    ) -> tuple[list[str], dict[str, str]]:
+        """
+        Apply `git update-ref --stdin` commands to branches in a single transaction.
+
+        If a ref can not be updated, it is reported and the transaction is retried without it,
+        unless atomic is True, in which case nothing is updated and only that ref is reported.
+        Returns the updated branches and a mapping of the ones that could not be updated to the reason.
+
+        Args:
+            commands (dict[str, str]): Mapping of branch names to their update-ref command,
+                e.g: {"main": "update refs/heads/main <new-oid> <old-oid>"}
+            atomic (bool, optional): Update nothing if any of the branches can not be updated. Defaults to False.
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+            message (str, optional): Reflog message for the updates. Defaults to None.
+        """
+        pending = dict(commands)
+        failed = {}
+        while pending:
+            result = self.update_refs(pending.values(), cwd, message)
+            if result.returncode == 0:
+                return list(pending), failed
+            failing = self._get_failing_branch(result.stderr, pending)
+            if failing is None or atomic:
+                for branch_name in [failing] if failing else pending:
+                    failed[branch_name] = f"{result.stderr}"
+                return [], failed
+            failed[failing] = f"{result.stderr}"
+            del pending[failing]
+        return [], failed
+
+    def get_branch_oids(self, cwd: str = None) -> dict[str, str]:
+        """
+        Returns a mapping of local branch names to the object id they point to.
+
+        Args:
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+        """
+        try:
+            return GithRefs(cwd).branch_oids()
+        except (GithRefsError, OSError):
+            pass
+        result = self.run_git(["for-each-ref", "--format=%(objectname) %(refname:lstrip=2)", "refs/heads"], cwd=cwd)
+        if result.returncode != 0:
+            GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+        oids = {}
+        for line in result.stdout.splitlines():
+            oid, _, branch_name = line.partition(" ")
+            oids[branch_name] = oid
+        return oids
+
+    def get_checked_out_branches(self, cwd: str = None) -> dict[str, str]:
+        """
+        Returns a mapping of branch names checked out in any worktree to the worktree path.
+
+        Args:
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+        """
+        try:
+            return GithRefs(cwd).checked_out_branches()
+        except (GithRefsError, OSError):
+            pass
+        result = self.run_git(["worktree", "list", "--porcelain"], cwd=cwd)
+        checked_out = {}
+        path = None
+        for line in result.stdout.splitlines():
+            if line.startswith("worktree "):
+                path = line[len("worktree "):]
+            elif line.startswith("branch refs/heads/"):
+                checked_out[line[len("branch refs/heads/"):]] = path
+        return checked_out
+
+    def update_refs(self, commands, cwd: str = None, message: str = None) -> subprocess.CompletedProcess:
+        """
+        Run the given commands with a single `git update-ref --stdin` transaction.
+
+        The transaction is all or nothing: either every ref is updated or none is.
+
+        Args:
+            commands (Iterable[str]): update-ref commands, e.g: "delete refs/heads/test <oid>"
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+            message (str, optional): Reflog message for the updates. Defaults to None.
+        """
+        args = ["update-ref", "--stdin"] if message is None else ["update-ref", "-m", message, "--stdin"]
+        return self.run_git(args, input="".join(f"{command}\n" for command in commands), cwd=cwd)
+
+    def _get_failing_branch(self, stderr: str, branches: dict[str, str]) -> str:
+        """
+        Returns the branch named by a failed `git update-ref` transaction, or None if it can not be found.
+
+        Args:
+            stderr (str): Error output of `git update-ref`
+            branches (dict[str, str]): Branches that were part of the transaction
+        """
+        match = re.search(r"'refs/heads/([^']+)'", stderr)
+        if match and match.group(1) in branches:
+            return match.group(1)
+        return None
+
+    def select_from_str(self, selector: str, branches: list[str], remote: bool = False) -> list[tuple[int, str]]:
+        """
+        Process the selector string and return the index and name of the selected branches.
+
+        Names that are not branches select the only branch equal to them ignoring case, or containing them.
+        Typos are not tolerated as in find_branch, since the selected branches are deleted or kept.
 
         Args:
-            indexes (str): Comma-separated list of indexes
+            selector (str): Comma-separated indexes, ranges, globs, regexes or names, e.g: 1,3-400,feature/*,!17
+            branches (list[str]): Branch names, in index order
+            remote (bool, optional): The branches are remote-tracking ones, only indexed in memory. Defaults to False
         """
+        indexes = []
+
+        def resolve(query: str) -> str:
+            # the index is only opened if a name needs it
+            if not indexes:
+                indexes.append(GithTrigramIndex.open(None, branches) if remote else self.get_branch_index(branches))
+            return indexes[0].resolve(query, typos=False)
+
         try:
-            return [int(index) for index in indexes.split(",")]
-        except Exception as e:
+            return GithSelector(selector, resolve).select(branches)
+        except GithAmbiguousMatch as e:
+            self.show_matches(e, branches, not remote)
+        except ValueError as e:
             GithMessage(f"Error processing provided indexes: {e}", GithMessageLevel.ERROR)
 
-    def git_pull(self, branch_name: str) -> None:
+    def get_branch_index(self, branches: list[str]) -> GithTrigramIndex:
+        """
+        Returns the trigram index of the branch names, persisted in the repository when possible.
+
+        Args:
+            branches (list[str]): Current local branches
+        """
+        try:
+            refs = GithRefs()
+            return GithTrigramIndex.open(refs.common_dir, branches, GithBranchCache(refs).signature())
+        except (GithRefsError, OSError):
+            return GithTrigramIndex.open(None, branches)
+
+    def find_branch(self, query: str, branches: list[str], remote: bool = False) -> str:
+        """
+        Returns the branch with the given name, or the one best matching it.
+
+        If several branches match equally well, they are shown with their indexes and the program aborts.
+
+        Args:
+            query (str): Name, or part of the name, of a branch, e.g: login for feature/user-login
+            branches (list[str]): Branch names, in index order
+            remote (bool, optional): The branches are remote-tracking ones, only indexed in memory. Defaults to False
+        """
+        if query in branches:
+            return query
+        try:
+            index = GithTrigramIndex.open(None, branches) if remote else self.get_branch_index(branches)
+            return index.resolve(query)
+        except GithAmbiguousMatch as e:
+            self.show_matches(e, branches, not remote)
+        except ValueError as e:
+            GithMessage(f"{e}", GithMessageLevel.ERROR)
+
+    def show_matches(self, error: GithAmbiguousMatch, branches: list[str], current: bool = True) -> None:
+        """
+        Show the branches matching an ambiguous query, best first, and abort.
+
+        Args:
+            error (GithAmbiguousMatch): The ambiguous match
+            branches (list[str]): Branch names, in index order
+            current (bool, optional): Whether the branch of index 1 is the current one. Defaults to True.
+        """
+        indexes = {name: index for index, name in enumerate(branches, start=1)}
+        self.print_branch_rows([(indexes[name], name) for name in error.matches if name in indexes], current=current)
+        GithMessage(f"{error} Use the index of the one you want.", GithMessageLevel.ERROR)
+
+    def git_pull(self, branch_name: str, cwd: str = None, verbose: bool = True, remote: str = "origin") -> None:
         """
         Pull the latest changes from the specified branch.
 
         Args:
             branch_name (str): The name of the branch to pull changes from.
+            cwd (str, optional): Worktree to pull into. Defaults to None (current directory).
+            verbose (bool, optional): Print a message if the changes are pulled. Defaults to True.
+            remote (str, optional): Remote to pull from. Defaults to "origin".
         """
-        result = subprocess.run(
-            ["git", "pull", "origin", branch_name], capture_output=True, text=True
-        )
-        if result.returncode == 0:
-            GithMessage(f"Pulling changes from [green]{branch_name}[/green]", GithMessageLevel.LOG)
-        else:
+        result = self.run_network_git(["pull", remote, branch_name], cwd=cwd)
+        if result.returncode == 0 and verbose:
+            self.report(f"Pulling changes from [green]{branch_name}[/green]", "pulled", branch=branch_name)
+        elif result.returncode != 0:
             GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
 
-    def create_repo(self, url: str, config: dict) -> None:
+    def sync_branches(self, dry_run: bool = False) -> None:
+        """
+        Fast-forward every local branch whose upstream moved, after a single fetch.
+
+        1. read the upstream of every local branch with one `git for-each-ref`
+        2. fetch all their remotes with one `git fetch --multiple`
+        3. fast-forward the branches that are only behind their upstream, updating the refs
+        directly in one transaction, so the working tree is never touched
+
+        Diverged branches and branches checked out in a worktree are reported and left as they are.
+
+        Args:
+            dry_run (bool, optional): Only show what would be updated, from the remote-tracking branches as of
+                the last fetch. Nothing is fetched. Defaults to False.
+        """
+        remotes = [] if dry_run else sorted({
+            remote for remote in self.run_git(
+                ["for-each-ref", "--format=%(upstream:remotename)", "refs/heads"]
+            ).stdout.split() if remote != "."
+        })
+        if remotes:
+            result = self.run_network_git(["fetch", "--multiple", *remotes])
+            if result.returncode != 0:
+                GithMessage(f"{result.stderr}", GithMessageLevel.ERROR)
+            self.report(f"Fetched [green]{', '.join(remotes)}[/green]", "fetched", remotes=remotes)
+
+        result = self.run_git([
+            "for-each-ref",
+            "--format=%(refname)%00%(objectname)%00%(upstream)%00%(upstream:track,nobracket)",
+            "refs/heads",
+            "refs/remotes",
+        ])
+        oids = {}
+        tracking = []
+        for line in result.stdout.splitlines():
+            refname, oid, upstream, track = line.split("\0")
+            oids[refname] = oid
+            if refname.startswith("refs/heads/") and upstream:
+                tracking.append((refname[len("refs/heads/"):], oid, upstream, track))
+        if not tracking:
+            GithMessage("No local branch is tracking an upstream branch.", GithMessageLevel.INFO)
+            return
+
+        checked_out = self.get_checked_out_branches()
+        commands = {}
+        skipped = []
+        for branch_name, oid, upstream, track in tracking:
+            if not track.startswith("behind"):
+                # up to date, only ahead, gone or diverged
+                if "behind" in track or track == "gone":
+                    skipped.append((f"[red]{branch_name}[/red] ({track}), not updated.", branch_name, track, None))
+                continue
+            if branch_name in checked_out:
+                skipped.append((
+                    f"[yellow]{branch_name}[/yellow] ({track}) is checked out at '{checked_out[branch_name]}', "
+                    "pull it from there.",
+                    branch_name,
+                    track,
+                    checked_out[branch_name],
+                ))
+                continue
+            commands[branch_name] = f"update refs/heads/{branch_name} {oids[upstream]} {oid}"
+
+        if dry_run:
+            updated, failed = list(commands), {}
+        else:
+            updated, failed = self.apply_ref_updates(commands, message="gith sync: fast-forward")
+        tracks = {branch_name: track for branch_name, _, _, track in tracking}
+        upstreams = {branch_name: upstream[len("refs/remotes/"):] for branch_name, _, upstream, _ in tracking}
+        action, record_type = ("Would fast-forward", "would_update") if dry_run else ("Fast-forwarded", "updated")
+        for branch_name in updated:
+            self.report(
+                f"{action} [green]{branch_name}[/green] ({tracks[branch_name]})",
+                record_type,
+                branch=branch_name,
+                upstream=upstreams[branch_name],
+                track=tracks[branch_name],
+            )
+        if console.json:
+            for branch_name, error in failed.items():
+                console.emit("update_failed", branch=branch_name, error=console.plain(error))
+            for _, branch_name, track, path in skipped:
+                console.emit("skipped", branch=branch_name, track=track, checked_out=path)
+            return
+        for error in dict.fromkeys(failed.values()):
+            GithMessage(error, GithMessageLevel.ERROR, abort=False)
+        if skipped:
+            GithMessage("\n".join(message for message, _, _, _ in skipped), GithMessageLevel.INFO)
+        GithMessage("Process [green]Done.[/green]", GithMessageLevel.LOG)
+
+    def create_repo(self, url: str, config: dict, performance: dict = None, clone: dict = None) -> None:
         """Create a new local repository for the given URL.
 
         Check first if the command is executed from a folder with the same name as the repository.
-        If not, then create a folder with the repository name and move into it.
+        If not, then create a folder with the repository name and set the repository up in it.
 
         Args:
             url (str): Repository URL. e.g: git@github.com:rejamen/my_cool_project.git
             config (dict): Configuration options for the repository.
+            performance (dict, optional): The [performance] section of gith.conf, see GithPerformance.
+                Defaults to None (git defaults).
+            clone (dict, optional): Clone the repository with these options of clone_repo, e.g: {"depth": 1},
+                instead of only initializing it. Defaults to None
         """
-        repo_name = url.split("/")[-1].replace(".git", "")
-        current_folder = os.path.basename(os.getcwd())
-        if current_folder != repo_name:
-            try:
-                os.makedirs(repo_name, exist_ok=True)
-                os.chdir(repo_name)
-                GithMessage(f"Created folder [green]{repo_name}[/green].", GithMessageLevel.LOG)
-            except Exception as e:
-                GithMessage(f"Error creating folder: {e}", GithMessageLevel.ERROR)
-        self.git_init()
-        self.set_main_branch("main")
-        alias = config.get("alias", None)
-        self.add_remote_url(url, alias)
-        set_local_config = config.get('set_local_config', False) in ('True', 'true')
-        if set_local_config:
-            self.set_local_config(config)
+        repo_name = self.get_repo_name(url)
+        path = "." if os.path.basename(os.getcwd()) == repo_name else repo_name
+        profile = None
+        if performance is not None:
+            from .performance import GithPerformance
+
+            profile = GithPerformance(performance)
+        settings = profile.sections() if profile else None
+        try:
+            if clone is not None:
+                lines = self.clone_repo(url, path, config, settings, **clone)
+            else:
+                lines = self.init_repo(url, path, config, settings)
+            for line in lines:
+                GithMessage(line, GithMessageLevel.LOG)
+        except (GithRepoError, OSError) as e:
+            GithMessage(f"{e}", GithMessageLevel.ERROR)
+        if profile and profile.enabled["maintenance"]:
+            error = profile.start_maintenance(path)
+            if error:
+                GithMessage(f"Unable to schedule git maintenance: {error}", GithMessageLevel.INFO)
+            else:
+                GithMessage("Scheduled [green]git maintenance[/green]", GithMessageLevel.LOG)
 
-    def git_init(self) -> None:
+    @staticmethod
+    def get_repo_name(url: str) -> str:
         """
-        Initialize a new Git repository.
+        Returns the name of the repository of the given URL.
+
+        Args:
+            url (str): Repository URL. e.g: git@github.com:rejamen/my_cool_project.git
         """
-        result = subprocess.run(["git", "init"], capture_output=True, text=True)
-        if result.returncode == 0:
-            GithMessage("Git repository initialized.", GithMessageLevel.LOG)
-        else:
-            GithMessage(f"Error initializing Git repository: {result.stderr}", GithMessageLevel.ERROR)
-    
-    def set_main_branch(self, branch_name: str) -> None:
+        return url.rstrip("/").split("/")[-1].split(":")[-1].replace(".git", "")
+
+    def init_repo(self, url: str, path: str, config: dict, settings: dict[str, dict[str, str]] = None) -> list[str]:
         """
-        Set the main branch for the Git repository.
+        Set up a repository in path, without changing the current directory, and return what was done.
+
+        The repository is initialized with `main` as default branch in a single `git init` call, and the
+        remote and local user are written to its config file directly, instead of one git call for each.
+        Raises GithRepoError if anything fails.
 
         Args:
-            branch_name (str): The name of the main branch.
+            url (str): Repository URL. e.g: git@github.com:rejamen/my_cool_project.git
+            path (str): Directory of the repository, created if needed
+            config (dict): Configuration options for the repository, the [repo] section of gith.conf
+            settings (dict[str, dict[str, str]], optional): More config values by section, e.g: the ones of
+                GithPerformance.sections(). Defaults to None
         """
-        result = subprocess.run(
-            ["git", "branch", "-M", branch_name], capture_output=True, text=True
-        )
-        if result.returncode == 0:
-            GithMessage(f"Main branch set to [green]{branch_name}[/green]", GithMessageLevel.LOG)
-        else:
-            GithMessage(f"Error setting main branch: {result.stderr}", GithMessageLevel.ERROR)
-    
-    def add_remote_url(self, url: str, alias: str=None) -> None:
+        lines = []
+        if not os.path.isdir(path):
+            os.makedirs(path)
+            lines.append(f"Created folder [green]{path}[/green].")
+        result = self.run_git(["init", "--quiet", "--initial-branch=main", path])
+        if result.returncode != 0:
+            raise GithRepoError(f"Error initializing Git repository: {result.stderr}")
+        lines.append("Git repository initialized.")
+        try:
+            refs = GithRefs(path)
+            current = refs.current_branch()
+        except GithRefsError:
+            refs, current = None, None
+        # an existing repository keeps its current branch when initialized again
+        if current != "main":
+            result = self.run_git(["branch", "-M", "main"], cwd=path)
+            if result.returncode != 0:
+                raise GithRepoError(f"Error setting main branch: {result.stderr}")
+        lines.append("Main branch set to [green]main[/green]")
+
+        alias = config.get("alias", None)
+        if alias:
+            url = url.replace("github.com", alias)
+        sections = {'remote "origin"': {"url": url, "fetch": "+refs/heads/*:refs/remotes/origin/*"}}
+        user = self.get_user_config(config)
+        if user:
+            sections["user"] = user
+        for section, values in (settings or {}).items():
+            sections.setdefault(section, {}).update(values)
+        config_path = os.path.join(refs.common_dir if refs else os.path.join(path, ".git"), "config")
+        self.write_git_config(config_path, sections)
+        lines.append(f"Remote URL set to [green]{url}[/green]")
+        return lines + self._config_lines(user, settings)
+
+    def clone_repo(
+        self,
+        url: str,
+        path: str,
+        config: dict,
+        settings: dict[str, dict[str, str]] = None,
+        filter: str = None,
+        depth: int = None,
+        sparse: list[str] = None,
+        progress: bool = True,
+    ) -> list[str]:
         """
-        Set the remote URL for the Git repository.
+        Clone the repository in path, without changing the current directory, and return what was done.
+
+        Large repositories can be cloned partially: without the objects left out by filter, e.g: blob:none,
+        which git fetches on demand, without the commits older than depth, and checking out only the sparse
+        directories (cone mode, more can be added later with `git sparse-checkout add`). The local user and
+        settings are written to the config by `git clone -c`. Raises GithRepoError if anything fails.
 
         Args:
-            url (str): The remote URL to set.
-            alias (str, optional): The alias for the remote. Defaults to None.
+            url (str): Repository URL. e.g: git@github.com:rejamen/my_cool_project.git
+            path (str): Directory of the repository, it must not exist or be empty
+            config (dict): Configuration options for the repository, the [repo] section of gith.conf
+            settings (dict[str, dict[str, str]], optional): More config values by section, e.g: the ones of
+                GithPerformance.sections(). Defaults to None
+            filter (str, optional): Partial clone filter, e.g: blob:none. Defaults to None (full clone)
+            depth (int, optional): Number of commits of history to clone. Defaults to None (all of them)
+            sparse (list[str], optional): Directories to check out, e.g: ["src/app"]. Defaults to None (all)
+            progress (bool, optional): Show the progress of git, see run_git_progress. Defaults to True.
         """
+        alias = config.get("alias", None)
         if alias:
-            url = url.replace('github.com', alias)
-        result = subprocess.run(
-            ["git", "remote", "add", "origin", url], capture_output=True, text=True
-        )
-        if result.returncode == 0:
-            GithMessage(f"Remote URL set to [green]{url}[/green]", GithMessageLevel.LOG)
-        else:
-            GithMessage(f"Error setting remote URL: {result.stderr}", GithMessageLevel.ERROR)
+            url = url.replace("github.com", alias)
+        user = self.get_user_config(config)
+        values = {f"user.{key}": value for key, value in (user or {}).items()}
+        for section, section_values in (settings or {}).items():
+            values.update({f"{section}.{key}": value for key, value in section_values.items()})
+        args = ["clone", "--progress" if progress else "--quiet"]
+        for key, value in values.items():
+            args += ["-c", f"{key}={value}"]
+        if filter:
+            args.append(f"--filter={filter}")
+        if depth:
+            args.append(f"--depth={depth}")
+        if sparse:
+            # only the top-level files are checked out until the sparse directories are set
+            args.append("--sparse")
+        run = self.run_git_progress if progress else self.run_git
+        result = run([*args, "--", url, path])
+        if result.returncode != 0:
+            raise GithRepoError(f"Error cloning repository: {result.stderr}")
+        partial = ([f"filter {filter}"] if filter else []) + ([f"depth {depth}"] if depth else [])
+        lines = [f"Cloned [green]{url}[/green] into [green]{path}[/green]"]
+        if partial:
+            lines[0] += f" ({', '.join(partial)})"
+        if sparse:
+            result = run(["sparse-checkout", "set", "--cone", "--", *sparse], cwd=path)
+            if result.returncode != 0:
+                raise GithRepoError(f"Error setting sparse checkout: {result.stderr}")
+            lines.append(f"Sparse checkout of [green]{', '.join(sparse)}[/green]")
+        return lines + self._config_lines(user, settings)
 
-    def set_local_config(self, config: dict) -> None:
+    @staticmethod
+    def get_user_config(config: dict) -> dict[str, str]:
         """
-        Set the local config for the Git repository.
-
-        At the moment, only user.name and user.email are supported.
+        Returns the local user of the [repo] section of gith.conf, e.g: {"name": "John", "email": "john@doe"},
+        or None if set_local_config is not True. Raises GithRepoError if the name or the email is missing.
 
         Args:
-            config (dict): Configuration options for the user data.
+            config (dict): Configuration options for the repository, the [repo] section of gith.conf
         """
+        if config.get("set_local_config", False) not in ("True", "true"):
+            return None
         user_name = config.get("user_name", None)
         user_email = config.get("user_email", None)
         if not user_name or not user_email:
-            GithMessage(
-                "User name and email are required to set local user data. Check your gith.conf file.",
-                GithMessageLevel.ERROR
-            )
-        result = subprocess.run(
-            ["git", "config", "--local", "user.name", user_name],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            GithMessage(
-                f"Local user.name set to [yellow]{user_name}[/yellow]",
-                GithMessageLevel.LOG
-            )
-        else:
-            GithMessage(
-                f"Error setting local user name: {result.stderr}",
-                GithMessageLevel.ERROR
-            )
-        
-        result = subprocess.run(
-            ["git", "config", "--local", "user.email", user_email],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            GithMessage(
-                f"Local user.email set to [yellow]{user_email}[/yellow]",
-                GithMessageLevel.LOG
-            )
-        else:
-            GithMessage(
-                f"Error setting local user email: {result.stderr}",
-                GithMessageLevel.ERROR
-            )
+            raise GithRepoError("User name and email are required to set local user data. Check your gith.conf file.")
+        return {"name": user_name, "email": user_email}
+
+    @staticmethod
+    def _config_lines(user: dict[str, str] = None, settings: dict[str, dict[str, str]] = None) -> list[str]:
+        """Returns the lines reporting the local user and settings written to a new repository."""
+        lines = []
+        if user:
+            lines.append(f"Local user.name set to [yellow]{user['name']}[/yellow]")
+            lines.append(f"Local user.email set to [yellow]{user['email']}[/yellow]")
+        if settings:
+            keys = [f"{section}.{key}" for section, values in settings.items() for key in values]
+            lines.append(f"Performance settings: [green]{', '.join(keys)}[/green]")
+        return lines
+
+    @staticmethod
+    def write_git_config(config_path: str, sections: dict[str, dict[str, str]]) -> None:
+        """
+        Append sections to a git config file, as `git config` would write them.
+
+        Raises GithRepoError if the remote is already configured, as `git remote add` does.
+
+        Args:
+            config_path (str): Path of the config file, e.g: .git/config
+            sections (dict[str, dict[str, str]]): Values by section, e.g: {"user": {"name": "John"}}
+        """
+        with open(config_path, encoding="utf-8") as file:
+            content = file.read()
+        headers = set(re.findall(r"^\s*\[([^\]]+)\]", content, re.MULTILINE))
+        text = []
+        for section, values in sections.items():
+            if section.startswith("remote ") and section in headers:
+                remote = section.split(" ", 1)[1].strip('"')
+                raise GithRepoError(f"Error setting remote URL: remote {remote} already exists.")
+            text.append(f"[{section}]\n")
+            for key, value in values.items():
+                value = value.replace("\\", "\\\\").replace('"', '\\"')
+                text.append(f'\t{key} = "{value}"\n')
+        with open(config_path, "a", encoding="utf-8") as file:
+            if content and not content.endswith("\n"):
+                file.write("\n")
+            file.write("".join(text))
+
 
 gith = GithHelper()
@@ -1,7 +1,7 @@
 import typer
-from enum import Enum
+from enum import Enum, IntEnum
 
-from .console import GithConsole
+from .console import console
 
 
 class GithMessageLevel(Enum):
@@ -22,8 +22,16 @@ class GithMessageLevel(Enum):
         self.color = color
 
 
+class GithExitCode(IntEnum):
+    """Exit codes of gith, stable across releases so scripts can rely on them."""
+    OK = 0
+    ERROR = 1
+    USAGE = 2
+    PARTIAL = 3
+
+
 class GithMessage:
-    """Class for displaying messages with different levels using GithConsole."""
+    """Class for displaying messages with different levels using the shared GithConsole."""
 
     def __init__(self, message: str, level: GithMessageLevel = GithMessageLevel.ERROR, abort=True):
         """
@@ -34,7 +42,7 @@ class GithMessage:
             level (GithMessageLevel, optional): The level of the message. Defaults to GithMessageLevel.ERROR.
             abort (bool, optional): Whether to abort the program if the message level is ERROR. Defaults to True.
         """
-        self.console = GithConsole()
+        self.console = console
         self.message = message
         self.level = level
         self._print_message(abort)
@@ -42,10 +50,18 @@ class GithMessage:
     def _print_message(self, abort: bool):
         """
         Print the message in a panel with the appropriate level and color.
+
+        In JSON output mode, errors are written as "error" records and the rest as "message" records.
         
         Args:
             abort (bool): Whether to abort the program or not.
         """
+        if self.console.json:
+            record_type = "error" if self.level == GithMessageLevel.ERROR else "message"
+            self.console.emit(record_type, level=self.level.level, message=self.console.plain(f"{self.message}"))
+            if self.level == GithMessageLevel.ERROR and abort:
+                raise typer.Exit(GithExitCode.ERROR)
+            return
         if self.level in (GithMessageLevel.ERROR, GithMessageLevel.INFO):
             self.console.print_panel(
                 self.message, self.level.level.title().upper(), self.level.color
@@ -0,0 +1,256 @@
+"""
+Operations on many repositories at once, used by `gith multi` and `gith repo --manifest`.
+
+The repositories of a workspace are found from a list file or a glob, and every operation runs on
+a thread pool, one repository per task. The output of each repository is collected while it runs
+and shown grouped, in the order of the list, followed by a summary of the ones that failed.
+"""
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from .console import console
+from .helpers import GithRepoError, gith
+from .messages import GithMessage, GithMessageLevel
+from .performance import GithPerformance
+from .refs import GithRefs, GithRefsError
+
+
+class GithRepoResult:
+    """Outcome of an operation on one repository of a workspace."""
+
+    def __init__(self, repo: str, ok: bool = True, lines: Optional[list[str]] = None):
+        """
+        Initialize a GithRepoResult instance.
+
+        Args:
+            repo (str): Path of the repository
+            ok (bool, optional): Whether the operation succeeded. Defaults to True.
+            lines (list[str], optional): Output of the operation, in Rich markup. Defaults to None.
+        """
+        self.repo = repo
+        self.ok = ok
+        self.lines = lines or []
+
+
+class GithMultiRepo:
+    """Run gith operations on many repositories at once, with a bounded pool of threads.
+
+    Repositories come from a workspace file (one path per line, relative to the file,
+    `#` for comments) or from a directory glob. Git is always run with the repository
+    as working directory, so the current directory of gith is never changed.
+    """
+
+    def __init__(self, repos: list[str], jobs: int = 8):
+        """
+        Initialize a GithMultiRepo instance.
+
+        Args:
+            repos (list[str]): Paths of the repositories
+            jobs (int, optional): Maximum number of repositories processed at the same time. Defaults to 8.
+        """
+        self.repos = repos
+        self.jobs = max(1, jobs)
+
+    @staticmethod
+    def discover(workspace: Optional[str] = None, pattern: Optional[str] = None) -> list[str]:
+        """
+        Returns the repositories listed in a workspace file or matching a directory glob.
+
+        Without arguments, every direct subdirectory of the current directory that is a Git repository is used.
+
+        Args:
+            workspace (str, optional): Path of a workspace file. Defaults to None.
+            pattern (str, optional): Glob of repository directories, e.g: services/*. Defaults to None.
+        """
+        if workspace:
+            base = os.path.dirname(os.path.abspath(workspace))
+            with open(workspace, encoding="utf-8") as file:
+                lines = [line.split("#", 1)[0].strip() for line in file]
+            paths = [os.path.normpath(os.path.join(base, os.path.expanduser(line))) for line in lines if line]
+        else:
+            paths = sorted(path for path in glob.glob(os.path.expanduser(pattern or "*")) if os.path.isdir(path))
+        return [path for path in paths if os.path.exists(os.path.join(path, ".git"))]
+
+    @staticmethod
+    def read_manifest(manifest: str) -> dict[str, str]:
+        """
+        Returns the repositories to set up, listed in a manifest file, as a mapping of path to URL.
+
+        Every line has a repository URL, optionally followed by the directory to set it up in,
+        relative to the current directory. It defaults to the name of the repository. `#` starts a comment.
+
+        Args:
+            manifest (str): Path of the manifest file
+        """
+        repos = {}
+        with open(manifest, encoding="utf-8") as file:
+            for line in file:
+                fields = line.split("#", 1)[0].split()
+                if not fields:
+                    continue
+                url = fields[0]
+                path = os.path.expanduser(fields[1]) if len(fields) > 1 else gith.get_repo_name(url)
+                repos[os.path.normpath(path)] = url
+        return repos
+
+    def run(self, operation: Callable[[str], GithRepoResult]) -> list[GithRepoResult]:
+        """
+        Run the operation on every repository and print the output of each one, in workspace order.
+
+        A summary of the failed repositories is shown at the end, aborting with an error if any failed.
+
+        Args:
+            operation (Callable[[str], GithRepoResult]): Function receiving the path of a repository
+        """
+        if not self.repos:
+            GithMessage("No repositories found. Use --workspace or --glob.", GithMessageLevel.ERROR)
+        results = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            futures = [(repo, pool.submit(self._safe_run, operation, repo)) for repo in self.repos]
+            for repo, future in futures:
+                result = future.result()
+                results.append(result)
+                style = "green" if result.ok else "red"
+                console.print_message(f"[bold {style}]{repo}[/bold {style}]")
+                for line in result.lines:
+                    console.print_message(f"  {line}")
+        failed = [result.repo for result in results if not result.ok]
+        if failed:
+            GithMessage(
+                f"{len(failed)} of {len(results)} repositories failed:\n" + "\n".join(failed),
+                GithMessageLevel.ERROR,
+            )
+        GithMessage(f"{len(results)} repositories [green]Done.[/green]", GithMessageLevel.LOG)
+        return results
+
+    @staticmethod
+    def _safe_run(operation: Callable[[str], GithRepoResult], repo: str) -> GithRepoResult:
+        """Run the operation, turning any exception into a failed result."""
+        try:
+            return operation(repo)
+        except Exception as e:
+            return GithRepoResult(repo, False, [f"{e}"])
+
+
+def list_branches(repo: str) -> GithRepoResult:
+    """
+    List the branches of the repository with their indexes.
+
+    Args:
+        repo (str): Path of the repository
+    """
+    branches = gith.git_branch(verbose=False, cwd=repo)
+    width = len(str(len(branches)))
+    return GithRepoResult(
+        repo,
+        lines=[
+            f"[green]{index:>{width}}  {name}[/green]" if index == 1 else f"{index:>{width}}  {name}"
+            for index, name in enumerate(branches, start=1)
+        ],
+    )
+
+
+def checkout_branch(branch_name: str) -> Callable[[str], GithRepoResult]:
+    """
+    Returns an operation checking out the given branch.
+
+    Args:
+        branch_name (str): Name of the branch to checkout to
+    """
+    def operation(repo: str) -> GithRepoResult:
+        result = gith.run_git(["checkout", branch_name], cwd=repo)
+        if result.returncode != 0:
+            return GithRepoResult(repo, False, [result.stderr.strip()])
+        return GithRepoResult(repo, lines=[f"Switched to branch [green]{branch_name}[/green]."])
+
+    return operation
+
+
+def keep_branches(keep: list[str], atomic: bool = False) -> Callable[[str], GithRepoResult]:
+    """
+    Returns an operation deleting every branch except the given ones.
+
+    Indexes are different in every repository, so branches to keep are given by name.
+
+    Args:
+        keep (list[str]): Names of the branches to keep
+        atomic (bool, optional): Delete nothing in a repository if any branch can not be deleted. Defaults to False.
+    """
+    def operation(repo: str) -> GithRepoResult:
+        branches = gith.git_branch(verbose=False, cwd=repo)
+        try:
+            current = GithRefs(repo).current_branch()
+        except GithRefsError:
+            current = branches[0] if branches else None
+        # the current branch can not be deleted, do not report it as a failure
+        kept = set(keep) | {current}
+        targets = [branch_name for branch_name in branches if branch_name not in kept]
+        deleted, failed = gith.delete_branch_refs(targets, atomic, cwd=repo)
+        lines = [f"Deleting [green]{branch_name}[/green]" for branch_name in deleted]
+        lines += list(failed.values())
+        if atomic and failed:
+            lines.append("No branches were deleted.")
+        return GithRepoResult(repo, not failed, lines)
+
+    return operation
+
+
+def pull(repo: str) -> GithRepoResult:
+    """
+    Pull the current branch of the repository from origin.
+
+    Args:
+        repo (str): Path of the repository
+    """
+    try:
+        branch_name = GithRefs(repo).current_branch()
+    except GithRefsError as e:
+        return GithRepoResult(repo, False, [f"{e}"])
+    if branch_name is None:
+        return GithRepoResult(repo, False, ["HEAD is detached, nothing to pull."])
+    result = gith.run_git(["pull", "origin", branch_name], cwd=repo)
+    if result.returncode != 0:
+        return GithRepoResult(repo, False, [result.stderr.strip()])
+    return GithRepoResult(repo, lines=[f"Pulling changes from [green]{branch_name}[/green]"])
+
+
+def init_repo(
+    urls: dict[str, str], config: dict, performance: Optional[dict] = None, clone: Optional[dict] = None
+) -> Callable[[str], GithRepoResult]:
+    """
+    Returns an operation setting up a new repository, as `gith repo <url>` does.
+
+    Args:
+        urls (dict[str, str]): Repository URL of every path, as returned by GithMultiRepo.read_manifest
+        config (dict): Configuration options for the repositories, the [repo] section of gith.conf
+        performance (dict, optional): The [performance] section of gith.conf, see GithPerformance.
+            Defaults to None (git defaults).
+        clone (dict, optional): Clone the repositories with these options of GithHelper.clone_repo, without
+            progress, instead of only initializing them. Defaults to None
+    """
+    profile = GithPerformance(performance) if performance is not None else None
+    # the same for every repository, so git is only asked once
+    settings = profile.sections() if profile else None
+    # `git maintenance start` writes the global config, which can not be locked twice at the same time
+    maintenance_lock = threading.Lock()
+
+    def operation(repo: str) -> GithRepoResult:
+        try:
+            if clone is not None:
+                lines = gith.clone_repo(urls[repo], repo, config, settings, **clone, progress=False)
+            else:
+                lines = gith.init_repo(urls[repo], repo, config, settings)
+        except (GithRepoError, OSError) as e:
+            return GithRepoResult(repo, False, [f"{e}".strip()])
+        if profile and profile.enabled["maintenance"]:
+            with maintenance_lock:
+                error = profile.start_maintenance(repo)
+            lines.append(
+                f"Unable to schedule git maintenance: {error}" if error else "Scheduled [green]git maintenance[/green]"
+            )
+        return GithRepoResult(repo, lines=lines)
+
+    return operation
@@ -0,0 +1,122 @@
+import time
+from typing import Optional
+
+from .helpers import GithRepoError, gith
+
+
+class GithPerformance:
+    """Git settings that keep large repositories fast, from the [performance] section of gith.conf.
+
+    Every option is enabled unless it is set to false in that section:
+
+    * untracked_cache: `core.untrackedCache`, so `git status` only scans the directories that changed.
+    * commit_graph: `fetch.writeCommitGraph`, so every fetch updates the commit-graph used by log,
+      merge-base and the ahead/behind counts of `gith branch --details`.
+    * many_files: `feature.manyFiles`, a smaller index that is faster to write.
+    * fsmonitor: `core.fsmonitor`, the file system monitor built into git, only where git ships it
+      (macOS and Windows), so `git status` does not scan the worktree at all.
+    * maintenance: `git maintenance start`, which prefetches, updates the commit-graph and repacks
+      in the background on a schedule.
+    """
+
+    SETTINGS = {
+        "untracked_cache": {"core.untrackedCache": "true"},
+        "commit_graph": {"fetch.writeCommitGraph": "true"},
+        "many_files": {"feature.manyFiles": "true"},
+        "fsmonitor": {"core.fsmonitor": "true"},
+    }
+    OPTIONS = [*SETTINGS, "maintenance"]
+
+    def __init__(self, config: Optional[dict] = None):
+        """
+        Initialize the profile.
+
+        Args:
+            config (dict, optional): The [performance] section of gith.conf. Defaults to None (every option enabled).
+        """
+        config = config or {}
+        self.enabled = {
+            name: str(config.get(name, "true")).lower() in ("true", "yes", "on", "1") for name in self.OPTIONS
+        }
+        self._fsmonitor = None
+
+    def fsmonitor_available(self) -> bool:
+        """Whether git was built with its own file system monitor."""
+        if self._fsmonitor is None:
+            self._fsmonitor = "fsmonitor--daemon" in gith.run_git(["version", "--build-options"]).stdout
+        return self._fsmonitor
+
+    def settings(self) -> dict[str, str]:
+        """
+        Returns the git config values of the enabled options, e.g: {"core.untrackedCache": "true"}.
+        """
+        settings = {}
+        for name, values in self.SETTINGS.items():
+            if self.enabled[name] and (name != "fsmonitor" or self.fsmonitor_available()):
+                settings.update(values)
+        return settings
+
+    def sections(self) -> dict[str, dict[str, str]]:
+        """
+        Returns the settings by config section, as written by GithHelper.write_git_config.
+        """
+        sections = {}
+        for key, value in self.settings().items():
+            section, _, name = key.rpartition(".")
+            sections.setdefault(section, {})[name] = value
+        return sections
+
+    def apply(self, cwd: Optional[str] = None) -> list[str]:
+        """
+        Set the settings that differ in the local config of the repository, and return their keys.
+
+        The commit-graph is also written once, so it is used right away instead of after the next fetch.
+        Raises GithRepoError if a setting can not be written.
+
+        Args:
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+        """
+        current = {}
+        for line in gith.run_git(["config", "--local", "--list"], cwd=cwd).stdout.splitlines():
+            key, _, value = line.partition("=")
+            current[key.lower()] = value
+        changed = []
+        for key, value in self.settings().items():
+            if current.get(key.lower()) == value:
+                continue
+            result = gith.run_git(["config", "--local", key, value], cwd=cwd)
+            if result.returncode != 0:
+                raise GithRepoError(f"Error setting {key}: {result.stderr}")
+            changed.append(key)
+        if self.enabled["commit_graph"]:
+            gith.run_git(["commit-graph", "write", "--reachable"], cwd=cwd)
+        return changed
+
+    def start_maintenance(self, cwd: Optional[str] = None) -> str:
+        """
+        Register the repository for scheduled maintenance, if enabled. Returns the error of git, if any.
+
+        Args:
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+        """
+        if not self.enabled["maintenance"]:
+            return ""
+        result = gith.run_git(["maintenance", "start"], cwd=cwd)
+        return "" if result.returncode == 0 else result.stderr.strip()
+
+    @staticmethod
+    def time_status(cwd: Optional[str] = None, runs: int = 3) -> float:
+        """
+        Returns the best wall time of `git status`, in seconds, over some runs.
+
+        Args:
+            cwd (str, optional): Path of the repository. Defaults to the current directory.
+            runs (int, optional): Number of runs. Defaults to 3.
+        """
+        best = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            gith.run_git(["status", "--porcelain"], cwd=cwd)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
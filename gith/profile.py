@@ -0,0 +1,151 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+from .console import console
+
+
+class GithProfiler:
+    """Record every git invocation made by gith and report where the time goes.
+
+    Disabled by default. Once started (with `gith --profile` or GITH_PROFILE=1), every call made
+    through GithHelper.run_git is recorded, and at exit a summary table is printed and a
+    Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev) is written.
+    """
+
+    def __init__(self):
+        """Initialize a disabled profiler."""
+        self.enabled = False
+        self.output = None
+        self.records = []
+        self._start = None
+        self._lock = threading.Lock()
+
+    def start(self, output: str) -> None:
+        """
+        Start recording git invocations.
+
+        Args:
+            output (str): Path of the Chrome trace JSON file written at exit.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self.output = output
+        self._start = time.perf_counter()
+        atexit.register(self.finish)
+
+    def record(
+        self, argv: list[str], start: float, end: float, returncode: int, stdout_bytes: int, stderr_bytes: int
+    ) -> None:
+        """
+        Record a finished git invocation. Does nothing if the profiler is not enabled.
+
+        Args:
+            argv (list[str]): Full command line, e.g: ["git", "checkout", "main"]
+            start (float): time.perf_counter() when the process was started
+            end (float): time.perf_counter() when the process finished
+            returncode (int): Exit code of the process
+            stdout_bytes (int): Size of the standard output
+            stderr_bytes (int): Size of the standard error
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.records.append({
+                "argv": argv,
+                "start": start,
+                "duration": end - start,
+                "returncode": returncode,
+                "stdout_bytes": stdout_bytes,
+                "stderr_bytes": stderr_bytes,
+                "thread": threading.get_ident(),
+            })
+
+    def finish(self) -> None:
+        """Print the summary table and write the trace file."""
+        total = time.perf_counter() - self._start
+        self.print_summary(total)
+        try:
+            self.write_trace(total)
+            console.print_message(f"Profile written to [green]{self.output}[/green]")
+        except OSError as e:
+            console.print_message(f"Unable to write profile to [red]{self.output}[/red]: {e}")
+        console.flush()
+
+    def print_summary(self, total: float) -> None:
+        """
+        Print the time spent in git, grouped by git subcommand.
+
+        Args:
+            total (float): Total run time of gith, in seconds
+        """
+        groups = {}
+        for record in self.records:
+            name = " ".join(record["argv"][:2])
+            group = groups.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0, "failed": 0, "output": 0})
+            group["calls"] += 1
+            group["total"] += record["duration"]
+            group["max"] = max(group["max"], record["duration"])
+            group["failed"] += record["returncode"] != 0
+            group["output"] += record["stdout_bytes"] + record["stderr_bytes"]
+        columns = [
+            {"name": "Command", "justify": "left"},
+            {"name": "Calls"},
+            {"name": "Total ms"},
+            {"name": "Max ms"},
+            {"name": "Failed"},
+            {"name": "Output bytes"},
+        ]
+        rows = [
+            {
+                "data": [
+                    name,
+                    str(group["calls"]),
+                    f"{group['total'] * 1000:.1f}",
+                    f"{group['max'] * 1000:.1f}",
+                    str(group["failed"]),
+                    str(group["output"]),
+                ],
+                "style": "red" if group["failed"] else "default",
+            }
+            for name, group in sorted(groups.items(), key=lambda item: item[1]["total"], reverse=True)
+        ]
+        console.print_table(columns, rows)
+        git_time = sum(record["duration"] for record in self.records)
+        console.print_message(
+            f"{len(self.records)} git calls took [yellow]{git_time * 1000:.1f} ms[/yellow] "
+            f"of [yellow]{total * 1000:.1f} ms[/yellow] in total."
+        )
+
+    def write_trace(self, total: float) -> None:
+        """
+        Write the recorded invocations in the Chrome trace event format.
+
+        Args:
+            total (float): Total run time of gith, in seconds
+        """
+        pid = os.getpid()
+        events = [{"name": "gith", "ph": "X", "ts": 0, "dur": total * 1e6, "pid": pid, "tid": 0}]
+        for record in self.records:
+            events.append({
+                "name": " ".join(record["argv"][:2]),
+                "ph": "X",
+                "ts": (record["start"] - self._start) * 1e6,
+                "dur": record["duration"] * 1e6,
+                "pid": pid,
+                "tid": record["thread"],
+                "args": {
+                    "argv": record["argv"],
+                    "exit_code": record["returncode"],
+                    "stdout_bytes": record["stdout_bytes"],
+                    "stderr_bytes": record["stderr_bytes"],
+                },
+            })
+        with open(self.output, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+profiler = GithProfiler()
@@ -0,0 +1,309 @@
+import mmap
+import os
+from typing import Optional, Union
+
+
+def atomic_write(path: str, data: Union[str, bytes]) -> None:
+    """
+    Write a file inside the repository, replacing the previous one at once, so readers never see
+    it half written. Raises OSError if it can not be written, leaving no temporary file behind.
+
+    Args:
+        path (str): Path of the file
+        data (Union[str, bytes]): Content of the file, text is written as UTF-8
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(data.encode("utf-8") if isinstance(data, str) else data)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class GithRefsError(Exception):
+    """Raised when the repository refs can not be read without calling git."""
+
+
+class GithRefs:
+    """Read local and remote-tracking branches directly from the repository files, without spawning git.
+
+    Supports loose refs under `refs/heads` and `refs/remotes`, `packed-refs`, linked worktrees and `commondir`.
+    Repositories using the reftable backend are not supported and raise GithRefsError,
+    so callers can fall back to the git binary.
+    """
+
+    HEADS = "refs/heads/"
+    REMOTES = "refs/remotes/"
+    CHECKOUT = b"\tcheckout: moving from "
+    # branches ordered by their last checkout, the others follow alphabetically, so the reflog
+    # scan stops early even when some branches were never checked out
+    RECENT_LIMIT = 100
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Locate the Git directory for the given path.
+
+        Args:
+            path (str, optional): Any path inside the repository. Defaults to the current directory.
+        """
+        self.git_dir = self.find_git_dir(path or os.getcwd())
+        self.common_dir = self._read_common_dir(self.git_dir)
+        if os.path.isdir(os.path.join(self.common_dir, "reftable")):
+            raise GithRefsError("Repositories using reftable are not supported.")
+
+    @staticmethod
+    def find_git_dir(path: str) -> str:
+        """
+        Returns the Git directory of the repository containing path.
+
+        Honors GIT_DIR, `.git` directories, `.git` files (`gitdir: ...`) used by worktrees
+        and submodules, and bare repositories.
+
+        Args:
+            path (str): Any path inside the repository.
+        """
+        if os.environ.get("GIT_DIR"):
+            return os.path.abspath(os.environ["GIT_DIR"])
+        current = os.path.abspath(path)
+        while True:
+            dot_git = os.path.join(current, ".git")
+            if os.path.isdir(dot_git):
+                return dot_git
+            if os.path.isfile(dot_git):
+                with open(dot_git, encoding="utf-8") as file:
+                    content = file.read().strip()
+                if not content.startswith("gitdir:"):
+                    raise GithRefsError(f"Invalid .git file: {dot_git}")
+                return os.path.normpath(os.path.join(current, content[len("gitdir:"):].strip()))
+            if all(os.path.exists(os.path.join(current, name)) for name in ("HEAD", "objects", "refs")):
+                return current
+            parent = os.path.dirname(current)
+            if parent == current:
+                raise GithRefsError("Not a git repository (or any of the parent directories).")
+            current = parent
+
+    @staticmethod
+    def _read_common_dir(git_dir: str) -> str:
+        """
+        Returns the directory holding the refs shared by all worktrees.
+
+        Args:
+            git_dir (str): The Git directory of the current worktree.
+        """
+        commondir = os.path.join(git_dir, "commondir")
+        if not os.path.isfile(commondir):
+            return git_dir
+        with open(commondir, encoding="utf-8") as file:
+            return os.path.normpath(os.path.join(git_dir, file.read().strip()))
+
+    def read_head(self, git_dir: Optional[str] = None) -> str:
+        """
+        Returns the raw content of HEAD: either `ref: <refname>` or an object id.
+
+        Args:
+            git_dir (str, optional): Git directory of the worktree. Defaults to the current one.
+        """
+        try:
+            with open(os.path.join(git_dir or self.git_dir, "HEAD"), encoding="utf-8") as file:
+                return file.read().strip()
+        except OSError as e:
+            raise GithRefsError(f"Unable to read HEAD: {e}")
+
+    def read_fetch_head(self) -> str:
+        """
+        Returns the object id of the first ref for merge in FETCH_HEAD, as written by the last `git fetch`.
+        """
+        try:
+            with open(os.path.join(self.git_dir, "FETCH_HEAD"), encoding="utf-8") as file:
+                for line in file:
+                    fields = line.split("\t")
+                    if len(fields) > 1 and fields[1] != "not-for-merge":
+                        return fields[0]
+        except OSError as e:
+            raise GithRefsError(f"Unable to read FETCH_HEAD: {e}")
+        raise GithRefsError("FETCH_HEAD has no ref for merge.")
+
+    def current_branch(self) -> Optional[str]:
+        """
+        Returns the name of the checked out branch, or None if HEAD is detached.
+        """
+        head = self.read_head()
+        if head.startswith(f"ref: {self.HEADS}"):
+            return head[len(f"ref: {self.HEADS}"):]
+        return None
+
+    def branch_oids(self) -> dict[str, str]:
+        """
+        Returns a mapping of local branch names to the object id they point to.
+
+        Loose refs take precedence over the ones in packed-refs, as in git.
+        """
+        return self.ref_oids(self.HEADS)
+
+    def ref_oids(self, prefix: str) -> dict[str, str]:
+        """
+        Returns a mapping of the names of the refs under prefix, without it, to the object id they point to.
+
+        Loose refs take precedence over the ones in packed-refs, as in git.
+
+        Args:
+            prefix (str): Prefix of the refs, e.g: refs/heads/
+        """
+        oids = self._read_packed_refs(prefix)
+        refs_dir = os.path.join(self.common_dir, *prefix.strip("/").split("/"))
+        for root, _, files in os.walk(refs_dir):
+            for name in files:
+                if name.endswith(".lock"):
+                    continue
+                path = os.path.join(root, name)
+                ref_name = os.path.relpath(path, refs_dir).replace(os.sep, "/")
+                try:
+                    with open(path, encoding="utf-8") as file:
+                        value = file.read().strip()
+                except OSError:
+                    continue
+                if value.startswith("ref: "):
+                    target = value[len("ref: "):]
+                    oid = oids.get(target[len(prefix):]) if target.startswith(prefix) else None
+                    if oid is None:
+                        continue
+                    value = oid
+                oids[ref_name] = value
+        return oids
+
+    def _read_packed_refs(self, prefix: str) -> dict[str, str]:
+        """
+        Returns the refs under prefix stored in packed-refs.
+
+        Args:
+            prefix (str): Prefix of the refs, e.g: refs/heads/
+        """
+        oids = {}
+        try:
+            with open(os.path.join(self.common_dir, "packed-refs"), encoding="utf-8") as file:
+                for line in file:
+                    if line.startswith(("#", "^")):
+                        continue
+                    oid, _, refname = line.rstrip("\n").partition(" ")
+                    if refname.startswith(prefix):
+                        oids[refname[len(prefix):]] = oid
+        except FileNotFoundError:
+            pass
+        return oids
+
+    def remote_branches(self) -> list[str]:
+        """
+        Returns the remote-tracking branches, e.g: origin/main, sorted alphabetically, as of the last fetch.
+
+        Same content as the output of `git branch --remotes`, without the `<remote>/HEAD` symbolic refs.
+        """
+        return sorted(name for name in self.ref_oids(self.REMOTES) if not name.endswith("/HEAD"))
+
+    def branches(self) -> list[str]:
+        """
+        Returns the local branches, current branch first and the rest sorted alphabetically.
+
+        Same order and content as the output of `git branch`. A detached HEAD is listed first
+        as `(HEAD detached at <oid>)`, and an unborn current branch is not listed at all.
+        """
+        oids = self.branch_oids()
+        current = self.current_branch()
+        others = sorted(name for name in oids if name != current)
+        if current is None:
+            return [f"(HEAD detached at {self.read_head()[:7]})"] + others
+        if current in oids:
+            return [current] + others
+        return others
+
+    def worktrees(self) -> list[tuple[str, str]]:
+        """
+        Returns the Git directory and path of the main worktree and every linked worktree.
+        """
+        worktrees = [(self.common_dir, os.path.dirname(self.common_dir))]
+        worktrees_dir = os.path.join(self.common_dir, "worktrees")
+        if os.path.isdir(worktrees_dir):
+            for name in os.listdir(worktrees_dir):
+                git_dir = os.path.join(worktrees_dir, name)
+                try:
+                    with open(os.path.join(git_dir, "gitdir"), encoding="utf-8") as file:
+                        path = os.path.dirname(file.read().strip())
+                except OSError:
+                    continue
+                worktrees.append((git_dir, path))
+        return worktrees
+
+    def checked_out_branches(self) -> dict[str, str]:
+        """
+        Returns a mapping of branch names checked out in any worktree to the worktree path.
+        """
+        checked_out = {}
+        for git_dir, path in self.worktrees():
+            try:
+                head = self.read_head(git_dir)
+            except GithRefsError:
+                continue
+            if head.startswith(f"ref: {self.HEADS}"):
+                checked_out[head[len(f"ref: {self.HEADS}"):]] = path
+        return checked_out
+
+    def recent_branches(self, names: set[str], count: Optional[int] = None) -> list[str]:
+        """
+        Returns the given branches that were checked out, most recent first, from the HEAD reflog.
+
+        The reflog is memory-mapped and searched backwards for checkout entries only, and the scan
+        stops as soon as count branches (all of them by default) are found, so long reflogs are
+        not read entirely. A branch is as recent as the last checkout moving to or from it.
+
+        Args:
+            names (set[str]): Names of the branches to look for.
+            count (int, optional): Stop after this number of branches. Defaults to all of them.
+        """
+        wanted = len(names) if count is None else min(count, len(names))
+        found = []
+        if not wanted:
+            return found
+        try:
+            with open(os.path.join(self.git_dir, "logs", "HEAD"), "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                    end = len(log)
+                    while len(found) < wanted:
+                        position = log.rfind(self.CHECKOUT, 0, end)
+                        if position < 0:
+                            break
+                        line_end = log.find(b"\n", position)
+                        entry = log[position + len(self.CHECKOUT):line_end if line_end >= 0 else len(log)]
+                        source, _, target = entry.decode("utf-8", "replace").partition(" to ")
+                        for name in (target.strip(), source.strip()):
+                            if name in names and name not in found:
+                                found.append(name)
+                        end = position
+        except (OSError, ValueError):
+            # no reflog, or an empty one that can not be mapped
+            pass
+        return found[:wanted]
+
+    def order_by_recent(self, branches: list[str], limit: Optional[int] = None) -> list[str]:
+        """
+        Returns the branches with the current one first, then the ones checked out most recently,
+        up to RECENT_LIMIT of them, then the rest sorted alphabetically.
+
+        The first limit branches are the same as without a limit, so `checkout --recent 3` only
+        has to find the 2 most recent branches.
+
+        Args:
+            branches (list[str]): Branches, as returned by branches()
+            limit (int, optional): Only order the first limit branches by recency. Defaults to all of them.
+        """
+        current = self.current_branch()
+        # the current branch, or the detached HEAD, stays at index 1
+        head = branches[:1] if branches and (current is None or branches[0] == current) else []
+        others = branches[len(head):]
+        count = self.RECENT_LIMIT if limit is None else min(max(limit - len(head), 0), self.RECENT_LIMIT)
+        recent = self.recent_branches(set(others), count)
+        found = set(recent)
+        return head + recent + [branch_name for branch_name in others if branch_name not in found]
@@ -0,0 +1,173 @@
+import fnmatch
+import re
+from typing import Callable, Optional
+
+
+class GithSelector:
+    """Select branches by index, range, name glob or regex.
+
+    A selector is a comma-separated list of terms, e.g: `1,3-400,feature/*,/^fix-\\d+$/,!17`:
+
+    * `3` selects the branch with index 3, and `3-400` every index from 3 to 400.
+    * `feature/*` selects the branches whose name matches the glob. A name without wildcards
+      selects that branch only, or, if there is no such branch, the one found by `resolve`
+      (see GithTrigramIndex.resolve).
+    * `/regex/` selects the branches whose name matches the regex. Commas are allowed inside it.
+    * `!term` excludes the branches matching the term. A selector with only exclusions
+      selects every branch except the excluded ones.
+
+    Terms are compiled once into sets and two combined regexes, so resolving a selector is a single
+    pass over the branch list, whatever the number of terms.
+    """
+
+    def __init__(self, selector: str, resolve: Optional[Callable[[str], str]] = None):
+        """
+        Compile a selector. Raises ValueError if it is not valid.
+
+        Args:
+            selector (str): Comma-separated list of terms
+            resolve (Callable[[str], str], optional): Returns the branch a name that is not a branch
+                refers to, or raises ValueError. Defaults to None (such names select nothing).
+        """
+        self.resolve = resolve
+        self.include = _GithTerms()
+        self.exclude = _GithTerms()
+        terms = self._split(selector)
+        if not terms:
+            raise ValueError("Empty selector.")
+        for term in terms:
+            if term.startswith("!"):
+                self.exclude.add(term[1:])
+            else:
+                self.include.add(term)
+        # only exclusions: start from every branch
+        self.include_all = self.include.empty()
+
+    @staticmethod
+    def _split(selector: str) -> list[str]:
+        """
+        Split the selector on commas, except inside /regex/ terms.
+
+        Args:
+            selector (str): Comma-separated list of terms
+        """
+        terms = []
+        position = 0
+        while position < len(selector):
+            start = position
+            if selector.startswith("/", position) or selector.startswith("!/", position):
+                # a regex ends at the next unescaped slash
+                position = selector.index("/", position) + 1
+                while position < len(selector) and selector[position] != "/":
+                    position += 2 if selector[position] == "\\" else 1
+                if position >= len(selector):
+                    raise ValueError(f"Unterminated regex: {selector[start:]}")
+                position += 1
+            end = selector.find(",", position)
+            end = len(selector) if end == -1 else end
+            term = selector[start:end].strip()
+            if term:
+                terms.append(term)
+            position = end + 1
+        return terms
+
+    def select(self, branches: list[str]) -> list[tuple[int, str]]:
+        """
+        Returns the index and name of the selected branches, in list order.
+
+        Args:
+            branches (list[str]): Branch names, in index order
+        """
+        known = set(branches) if self.resolve is not None else None
+        include = self.include.compile(len(branches), known, self.resolve)
+        exclude = self.exclude.compile(len(branches), known, self.resolve)
+        return [
+            (index, name)
+            for index, name in enumerate(branches, start=1)
+            if (self.include_all or include.matches(index, name)) and not exclude.matches(index, name)
+        ]
+
+
+class _GithTerms:
+    """Terms of one side (included or excluded) of a selector."""
+
+    def __init__(self):
+        self.indexes = set()
+        self.ranges = []
+        self.names = set()
+        self.patterns = []
+
+    def empty(self) -> bool:
+        """Whether no term was added."""
+        return not (self.indexes or self.ranges or self.names or self.patterns)
+
+    def add(self, term: str) -> None:
+        """
+        Add a term. Raises ValueError if it is not valid.
+
+        Args:
+            term (str): A single term, without the leading `!`
+        """
+        if not term:
+            raise ValueError("Empty term.")
+        if term.isdigit():
+            self.indexes.add(int(term))
+        elif re.fullmatch(r"\d+-\d+", term):
+            first, last = (int(value) for value in term.split("-"))
+            if first > last:
+                raise ValueError(f"Invalid range: {term}")
+            self.ranges.append((first, last))
+        elif len(term) > 1 and term.startswith("/") and term.endswith("/"):
+            try:
+                # compiled as it will be combined with the other patterns
+                self.patterns.append(re.compile(f"(?:{term[1:-1]})").pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid regex {term}: {e}")
+        elif any(char in term for char in "*?["):
+            # globs match the whole name, regexes anywhere in it
+            self.patterns.append(r"\A" + fnmatch.translate(term))
+        else:
+            self.names.add(term)
+
+    def compile(
+        self, count: int, known: Optional[set[str]] = None, resolve: Optional[Callable[[str], str]] = None
+    ) -> "_GithCompiledTerms":
+        """
+        Returns the terms ready to be matched against a list of count branches.
+
+        Ranges are expanded into the index set, clipped to the list, so matching an index is a set lookup.
+
+        Args:
+            count (int): Number of branches
+            known (set[str], optional): Names of the branches, needed with resolve. Defaults to None
+            resolve (Callable[[str], str], optional): Resolves names that are not branches. Defaults to None
+        """
+        names = self.names
+        if resolve is not None:
+            names = {name if name in known else resolve(name) for name in names}
+        indexes = set(self.indexes)
+        for first, last in self.ranges:
+            indexes.update(range(first, min(last, count) + 1))
+        pattern = re.compile("|".join(f"(?:{pattern})" for pattern in self.patterns)) if self.patterns else None
+        return _GithCompiledTerms(indexes, names, pattern)
+
+
+class _GithCompiledTerms:
+    """Terms of one side of a selector, compiled for a given list of branches."""
+
+    def __init__(self, indexes: set[int], names: set[str], pattern: Optional[re.Pattern]):
+        self.indexes = indexes
+        self.names = names
+        self.pattern = pattern
+
+    def matches(self, index: int, name: str) -> bool:
+        """
+        Whether the branch is matched by any of the terms.
+
+        Args:
+            index (int): Index of the branch
+            name (str): Name of the branch
+        """
+        if index in self.indexes or name in self.names:
+            return True
+        return self.pattern is not None and self.pattern.search(name) is not None
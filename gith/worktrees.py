@@ -0,0 +1,198 @@
+import json
+import os
+import time
+from typing import Optional
+
+from .helpers import gith
+from .refs import GithRefs, GithRefsError, atomic_write
+
+
+class GithWorktreeError(Exception):
+    """Raised when a worktree of the pool can not be created, reused or removed."""
+
+
+class GithWorktreePool:
+    """Bounded pool of `git worktree` checkouts of recently used branches.
+
+    Instead of rewriting the files of the current worktree, a branch is checked out once in its own
+    worktree, inside the pool directory, and switching to it again is instant. When the pool is full,
+    the least recently used worktree without local changes is reused for the new branch: it is moved
+    and switched with `git checkout`, which only rewrites the files that differ.
+
+    Which worktrees belong to the pool and their branches are read from the repository, so the pool
+    stays right when worktrees are changed with git. Only the last use of every worktree is stored,
+    in the Git directory shared by all worktrees.
+    """
+
+    FILE_NAME = "gith-worktrees.json"
+
+    def __init__(self, refs: GithRefs, directory: Optional[str] = None, size: int = 5):
+        """
+        Initialize the pool of the repository.
+
+        Args:
+            refs (GithRefs): Reader of the repository refs
+            directory (str, optional): Directory of the pool worktrees. Defaults to `<repository>.worktrees`
+                next to the main worktree.
+            size (int, optional): Maximum number of worktrees in the pool. Defaults to 5.
+        """
+        self.refs = refs
+        main = os.path.dirname(refs.common_dir)
+        # git stores the real path of the worktrees
+        self.directory = os.path.realpath(os.path.expanduser(directory or f"{main}.worktrees"))
+        self.size = max(1, size)
+        self.state_path = os.path.join(refs.common_dir, self.FILE_NAME)
+
+    def _read_state(self) -> dict[str, int]:
+        """Returns the last use (in ns) of every pool worktree path."""
+        try:
+            with open(self.state_path, encoding="utf-8") as file:
+                return json.load(file).get("used", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self, used: dict[str, int]) -> None:
+        """
+        Save the last use of every pool worktree path.
+
+        Args:
+            used (dict[str, int]): Last use (in ns) of every path
+        """
+        atomic_write(self.state_path, json.dumps({"used": used}))
+
+    def touch(self, path: str) -> None:
+        """
+        Mark a pool worktree as just used, forgetting the worktrees that do not exist anymore.
+
+        Args:
+            path (str): Path of the worktree
+        """
+        paths = {entry["path"] for entry in self.entries()} | {path}
+        used = {key: value for key, value in self._read_state().items() if key in paths}
+        used[path] = time.time_ns()
+        self._write_state(used)
+
+    def contains(self, path: str) -> bool:
+        """
+        Whether the path is a worktree of the pool.
+
+        Args:
+            path (str): Path of a worktree
+        """
+        return os.path.dirname(os.path.realpath(path)) == self.directory
+
+    def entries(self) -> list[dict]:
+        """
+        Returns the path, branch (None if detached) and last use of the pool worktrees, most recently used first.
+        """
+        used = self._read_state()
+        entries = []
+        for git_dir, path in self.refs.worktrees():
+            if not self.contains(path) or not os.path.isdir(path):
+                continue
+            try:
+                head = self.refs.read_head(git_dir)
+            except GithRefsError:
+                continue
+            branch_name = head[len(f"ref: {GithRefs.HEADS}"):] if head.startswith(f"ref: {GithRefs.HEADS}") else None
+            entries.append({"path": path, "branch": branch_name, "used": used.get(path, 0)})
+        return sorted(entries, key=lambda entry: entry["used"], reverse=True)
+
+    def path_for(self, branch_name: str) -> str:
+        """
+        Returns a free path in the pool directory for a branch, e.g: feature/login -> feature-login.
+
+        Args:
+            branch_name (str): Name of the branch
+        """
+        name = branch_name.replace("/", "-")
+        path = os.path.join(self.directory, name)
+        suffix = 2
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{name}-{suffix}")
+            suffix += 1
+        return path
+
+    def is_clean(self, path: str) -> bool:
+        """
+        Whether the worktree has no local changes nor untracked files, so it can be reused for another branch.
+
+        Args:
+            path (str): Path of the worktree
+        """
+        result = gith.run_git(["status", "--porcelain", "--untracked-files=normal"], cwd=path)
+        return result.returncode == 0 and not result.stdout.strip()
+
+    def switch(self, branch_name: str) -> tuple[str, bool]:
+        """
+        Returns the path of a worktree with the branch checked out, and whether the pool had to be exceeded.
+
+        The worktree where the branch is already checked out is used if there is one. Otherwise a new
+        worktree is added to the pool or, when it is full, the least recently used clean one is reused.
+        If all of them have local changes, the pool grows beyond its size until it is pruned.
+
+        Args:
+            branch_name (str): Name of the branch
+        """
+        path = self.refs.checked_out_branches().get(branch_name)
+        if path is not None:
+            if self.contains(path):
+                self.touch(path)
+            return path, False
+        entries = self.entries()
+        if len(entries) >= self.size:
+            for entry in reversed(entries):
+                if self.is_clean(entry["path"]):
+                    path = self._reuse(entry["path"], branch_name)
+                    self.touch(path)
+                    return path, False
+        path = self.path_for(branch_name)
+        os.makedirs(self.directory, exist_ok=True)
+        result = gith.run_git(["worktree", "add", path, branch_name])
+        if result.returncode != 0:
+            raise GithWorktreeError(f"Error adding worktree for {branch_name}: {result.stderr}")
+        self.touch(path)
+        return path, len(entries) >= self.size
+
+    def _reuse(self, path: str, branch_name: str) -> str:
+        """
+        Move a pool worktree to the path of another branch and check that branch out in it.
+
+        Args:
+            path (str): Path of the worktree to reuse
+            branch_name (str): Name of the branch to check out
+        """
+        new_path = self.path_for(branch_name)
+        result = gith.run_git(["worktree", "move", path, new_path])
+        if result.returncode != 0:
+            raise GithWorktreeError(f"Error moving worktree {path}: {result.stderr}")
+        result = gith.run_git(["checkout", branch_name], cwd=new_path)
+        if result.returncode != 0:
+            raise GithWorktreeError(f"Error checking out {branch_name} in {new_path}: {result.stderr}")
+        return new_path
+
+    def prune(self, keep: Optional[int] = None, force: bool = False) -> tuple[list[str], dict[str, str]]:
+        """
+        Remove the least recently used worktrees of the pool, keeping at most keep of them.
+
+        Returns the removed paths and the error of every worktree that could not be removed.
+        Worktrees with local changes are only removed if force is True.
+
+        Args:
+            keep (int, optional): Number of worktrees to keep. Defaults to the size of the pool.
+            force (bool, optional): Remove worktrees with local changes too. Defaults to False.
+        """
+        keep = self.size if keep is None else max(0, keep)
+        removed, failed = [], {}
+        for entry in self.entries()[keep:]:
+            args = ["worktree", "remove", *(["--force"] if force else []), entry["path"]]
+            result = gith.run_git(args)
+            if result.returncode == 0:
+                removed.append(entry["path"])
+            else:
+                failed[entry["path"]] = result.stderr.strip()
+        # forget the worktrees whose directory was deleted by hand
+        gith.run_git(["worktree", "prune"])
+        kept = {entry["path"] for entry in self.entries()}
+        self._write_state({key: value for key, value in self._read_state().items() if key in kept})
+        return removed, failed
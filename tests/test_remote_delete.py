@@ -0,0 +1,84 @@
+"""
+Deleting remote branches against a local bare repository whose hook protects one branch.
+"""
+import os
+import subprocess
+
+import pytest
+
+from gith.helpers import gith
+
+BRANCHES = ["feature/a", "feature/b", "protected", "feature/c"]
+HOOKS = {
+    # declines the whole push
+    "pre-receive": """#!/bin/sh
+while read old new ref; do
+    if [ "$ref" = "refs/heads/protected" ]; then
+        exit 1
+    fi
+done
+""",
+    # declines only the protected branch
+    "update": """#!/bin/sh
+test "$1" != "refs/heads/protected"
+""",
+}
+
+
+def git(*args: str, cwd: str) -> str:
+    """Run git in a directory and return its output."""
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+
+@pytest.fixture(params=HOOKS)
+def remote(request, tmp_path, monkeypatch):
+    """A bare repository with BRANCHES and a hook that rejects pushes to refs/heads/protected, run from a clone."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    for variable in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(variable, "gith")
+    for variable in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(variable, "gith@example.com")
+    bare, work = str(tmp_path / "bare.git"), str(tmp_path / "work")
+    git("init", "--bare", "-b", "main", bare, cwd=str(tmp_path))
+    git("clone", bare, work, cwd=str(tmp_path))
+    git("commit", "--allow-empty", "-m", "initial", cwd=work)
+    git("push", "origin", "main", *(f"main:{name}" for name in BRANCHES), cwd=work)
+    hook = os.path.join(bare, "hooks", request.param)
+    with open(hook, "w") as file:
+        file.write(HOOKS[request.param])
+    os.chmod(hook, 0o755)
+    git("fetch", "origin", cwd=work)
+    monkeypatch.chdir(work)
+    return bare
+
+
+def test_rejected_branch_is_retried_without(remote):
+    deleted, failed = gith.push_deletions([f"origin/{name}" for name in BRANCHES])
+    assert deleted == ["origin/feature/a", "origin/feature/b", "origin/feature/c"]
+    assert list(failed) == ["origin/protected"]
+    assert "[red]origin/protected[/red]" in failed["origin/protected"]
+    assert git("branch", "--format=%(refname:short)", cwd=remote).split() == ["main", "protected"]
+
+
+def test_atomic_deletes_nothing(remote):
+    deleted, failed = gith.push_deletions([f"origin/{name}" for name in BRANCHES], atomic=True)
+    assert deleted == []
+    assert sorted(failed) == sorted(f"origin/{name}" for name in BRANCHES)
+    assert "[red]origin/protected[/red]" in failed["origin/protected"]
+    assert git("branch", "--format=%(refname:short)", cwd=remote).split() == sorted(["main", *BRANCHES])
+
+
+@pytest.mark.parametrize(
+    "output, expected",
+    [
+        ("!\t:refs/heads/protected\t[remote rejected] (pre-receive hook declined)\nDone\n",
+         {"protected": "pre-receive hook declined"}),
+        ("!\t:refs/heads/feature/a\t[remote rejected] (atomic push failed)\n", {}),
+        ("error: unable to delete 'feature/a': remote ref does not exist\n",
+         {"feature/a": "remote ref does not exist"}),
+        ("!\t:refs/heads/other\t[remote rejected] (pre-receive hook declined)\n", {}),
+    ],
+)
+def test_get_rejected_refs(output, expected):
+    rejected = gith._get_rejected_refs(output, "origin", ["protected", "feature/a"])
+    assert rejected == {name: f"Unable to delete [red]origin/{name}[/red]: {reason}" for name, reason in expected.items()}
@@ -0,0 +1,82 @@
+"""
+Grammar of the branch selectors: indexes, ranges, exclusions, globs and regexes.
+"""
+import re
+
+import pytest
+
+from gith.selectors import GithSelector
+
+BRANCHES = ["main", "feature/login", "feature/logout", "fix-7", "fix-1234", "release/1.0"]
+
+
+def resolve(name: str) -> str:
+    """Resolves abbreviations as the fuzzy index would, e.g: login for feature/login."""
+    matches = [branch for branch in BRANCHES if branch.endswith(name)]
+    if len(matches) != 1:
+        raise ValueError(f"No branch matches {name}")
+    return matches[0]
+
+
+@pytest.mark.parametrize(
+    "selector, expected",
+    [
+        ("2", [2]),
+        ("1-3", [1, 2, 3]),
+        ("1-3,!2", [1, 3]),
+        ("!1", [2, 3, 4, 5, 6]),
+        ("!1,!3-5", [2, 6]),
+        ("5-100", [5, 6]),
+        ("9", []),
+        ("feature/*", [2, 3]),
+        ("*1*,!fix-*", [6]),
+        ("feature/log?n", [2]),
+        ("main, release/1.0", [1, 6]),
+        ("unknown", []),
+        ("/out$/", [3]),
+        ("/^fix-\\d{1,3}$/", [4]),
+        ("/^fix-\\d{1,3}$/,1", [1, 4]),
+        ("!/^fix-\\d{1,3}$/", [1, 2, 3, 5, 6]),
+        ("/a\\/b,c/,2", [2]),
+        ("2,2,1-2", [1, 2]),
+    ],
+)
+def test_select(selector, expected):
+    selected = GithSelector(selector).select(BRANCHES)
+    assert [index for index, _ in selected] == expected
+    assert [name for _, name in selected] == [BRANCHES[index - 1] for index in expected]
+
+
+@pytest.mark.parametrize(
+    "selector, expected",
+    [
+        ("login", [2]),
+        ("logout,!feature/logout", []),
+        ("main,1.0", [1, 6]),
+    ],
+)
+def test_select_resolves_names(selector, expected):
+    assert [index for index, _ in GithSelector(selector, resolve).select(BRANCHES)] == expected
+
+
+@pytest.mark.parametrize(
+    "selector, error",
+    [
+        ("", "Empty selector"),
+        (" , ", "Empty selector"),
+        ("/re", "Unterminated regex: /re"),
+        ("1,!/fix", "Unterminated regex: !/fix"),
+        ("/a\\/", "Unterminated regex"),
+        ("3-1", "Invalid range: 3-1"),
+        ("/(/", "Invalid regex /(/"),
+        ("1,!", "Empty term"),
+    ],
+)
+def test_invalid_selector(selector, error):
+    with pytest.raises(ValueError, match=re.escape(error)):
+        GithSelector(selector)
+
+
+def test_unresolved_name_is_an_error():
+    with pytest.raises(ValueError, match="No branch matches nothing"):
+        GithSelector("nothing", resolve).select(BRANCHES)
@@ -0,0 +1,45 @@
+"""
+Startup cost of gith: shell completion starts the interpreter on every keystroke.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# importing gith.cli once Typer is loaded, as a fraction of importing Typer itself. Measured against
+# Typer in the same interpreter, so it does not depend on the speed of the machine: loading Rich,
+# the Rich consoles and the config file eagerly costs about as much as Typer, lazily about 15%.
+IMPORT_BUDGET = 0.5
+RUNS = 3
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run the interpreter of the tests from the root of the repository."""
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def import_times(code: str) -> dict[str, int]:
+    """Returns the cumulative import time, in microseconds, of every module imported by the code."""
+    result = run_python("-X", "importtime", "-c", code)
+    # lines look like: "import time:  1861 |  95237 | gith.cli"
+    return {
+        fields[2].strip(): int(fields[1])
+        for fields in (line.split("|") for line in result.stderr.splitlines() if line.startswith("import time:"))
+        if fields[1].strip().isdigit()
+    }
+
+
+def test_import_time_budget():
+    # the best of a few runs, so a busy machine does not make it fail
+    ratios = []
+    for _ in range(RUNS):
+        times = import_times("import typer; import gith.cli")
+        ratios.append(times["gith.cli"] / times["typer"])
+    assert min(ratios) < IMPORT_BUDGET, f"importing gith.cli took {min(ratios):.0%} of the time of importing typer"
+
+
+def test_heavy_modules_are_not_imported():
+    result = run_python("-c", "import sys, gith.cli; print(*sorted(sys.modules))")
+    modules = result.stdout.split()
+    assert "rich" not in modules
+    assert "configparser" not in modules